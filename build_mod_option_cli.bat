@@ -0,0 +1,2 @@
+@echo off
+pyinstaller --noconfirm --onefile --clean --console --icon=assets/mod_option_selector_icon.ico --name=Mod_Option_CLI mod_option_cli.py
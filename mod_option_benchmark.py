@@ -0,0 +1,378 @@
+# Benchmarks for the Mod Option Selector on generated catalogs
+import argparse        # For benchmark options
+import json            # For writing catalogs and the results
+import os              # For file and path operations
+import platform        # To describe the machine in the results
+import random          # For reproducible file contents
+import shutil          # For copying assets and removing catalogs
+import statistics      # For median timings
+import sys             # For the Python version and exit codes
+import tempfile        # For the catalog folders
+import time            # For timing operations
+import zipfile         # To build the mod ZIPs
+from PIL import Image  # To draw preview images
+from mod_option_core import (  # The logic behind the selector's operations (no tkinter)
+    InstallDirIndex, InstallLedger, FileOwnerIndex, EntryStatusEngine, TextWidthTracker, process_memory,
+    create_install_job, installed_files, plan_install, create_plan_job, record_install_result,
+    record_plan_result, installed_entry_positions, create_verify_job
+)
+from mod_option_preview import PreviewCache, ThumbnailStore  # Preview decoding and caching
+
+# Layout of a generated catalog, relative to its root (the same as a real install)
+OPTIONS_FILE = 'data/mod_options.json'
+SETTINGS_FILE = 'data/settings.json'
+LEDGER_FILE = 'data/install_ledger.json'
+STORE_DIR = 'data/.cache/store'
+PREVIEW_CACHE_DIR = 'data/.cache/previews'
+INSTALL_DIR = 'install'
+
+# Size of the preview canvas the previews are scaled for
+PREVIEW_BOX = (640, 480)
+
+# Options installed together by the plan/apply benchmark
+PRESET_SIZE = 3
+
+
+def generate_catalog(root, entries=100, files=5, file_size=4096, preview_size=(1920, 1080),
+                     previews=10, compression="deflated", shared_files=1, seed=1):
+    """
+    Write a synthetic catalog under root: data/mod_options.json with `entries`
+    options, each with a ZIP of `files` members of file_size bytes (half
+    random, half zeros, so deflate has something to do) and a preview. Only
+    `previews` distinct preview images are drawn; the entries use them in
+    turn. With more than one, the last is a palette PNG. The first shared_files members of every ZIP have the same path, like
+    options that replace the same pak. Also writes settings (no prompts) and
+    copies the selector's assets. Returns the catalog dict.
+    """
+    rng = random.Random(seed)
+    method = zipfile.ZIP_STORED if compression == "stored" else zipfile.ZIP_DEFLATED
+    os.makedirs(os.path.join(root, "data", "zips"), exist_ok=True)
+    os.makedirs(os.path.join(root, "data", "previews"), exist_ok=True)
+    os.makedirs(os.path.join(root, INSTALL_DIR), exist_ok=True)
+
+    assets = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "assets")
+    if os.path.isdir(assets):
+        shutil.copytree(assets, os.path.join(root, "data", "assets"), dirs_exist_ok=True)
+
+    preview_paths = []
+    for i in range(max(1, previews)):
+        # The last of several previews is a palette PNG, the rest are JPEGs
+        palette = previews > 1 and i == previews - 1
+        preview_path = f"data/previews/preview_{i}.{'png' if palette else 'jpg'}"
+        # Noise over a gradient, so the previews do not compress unrealistically well
+        noise = Image.effect_noise(preview_size, 48)
+        gradient = Image.linear_gradient("L").resize(preview_size)
+        image = Image.merge("RGB", (noise, gradient, Image.blend(noise, gradient, 0.5)))
+        if palette:
+            image.quantize(64).save(os.path.join(root, preview_path))
+        else:
+            image.save(os.path.join(root, preview_path), quality=90)
+        preview_paths.append(preview_path)
+
+    catalog = {"mod_name": "Benchmark Mod", "mod_version": "1.0", "entries": []}
+    for i in range(entries):
+        zip_path = f"data/zips/option_{i}.zip"
+        names = [f"~Mods/shared_{j}.pak" if j < shared_files else f"~Mods/option_{i}/file_{j}.pak"
+                 for j in range(files)]
+        with zipfile.ZipFile(os.path.join(root, zip_path), "w", method) as zip_ref:
+            for name in names:
+                zip_ref.writestr(name, rng.randbytes(file_size // 2) + bytes(file_size - file_size // 2))
+        catalog["entries"].append({
+            "title": f"Option {i:05d} " + "x" * rng.randint(0, 40),
+            "zip_path": zip_path,
+            "preview": preview_paths[i % len(preview_paths)],
+            "files": names,
+            "chunk_id": str(i),
+            "replaces": f"Texture {i}",
+            "description": f"Synthetic option {i}"
+        })
+
+    with open(os.path.join(root, OPTIONS_FILE), "w") as f:
+        json.dump(catalog, f, indent=2)
+    with open(os.path.join(root, SETTINGS_FILE), "w") as f:
+        json.dump({
+            "install_dir": os.path.abspath(os.path.join(root, INSTALL_DIR)),
+            "CanInstallMultiple": False,
+            "PromptUser": False,
+            "PromptBeforeExit": False
+        }, f, indent=2)
+    return catalog
+
+
+def measure(operation, repeat=5, setup=None):
+    """
+    Time operation() repeat times (calling setup() untimed before each run)
+    and return the best and median time in milliseconds.
+    """
+    times = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        operation()
+        times.append((time.perf_counter() - start) * 1000)
+    return {"best_ms": round(min(times), 3), "median_ms": round(statistics.median(times), 3), "runs": repeat}
+
+
+def run_job(job):
+    """
+    Run an install job in this thread, raising its error if it failed.
+    """
+    job.run()
+    if job.error:
+        raise job.error
+    return job
+
+
+def run_core_benchmarks(repeat=5):
+    """
+    Time the work behind the selector's operations headlessly, in the current
+    folder (a generated catalog). Returns {operation name: timings}.
+    """
+    results = {}
+    with open(SETTINGS_FILE) as f:
+        settings = json.load(f)
+    install_dir = settings["install_dir"]
+
+    # reload_zip_data: parse the catalog and index which entries own each file
+    def load_catalog():
+        with open(OPTIONS_FILE) as f:
+            entries = json.load(f)["entries"]
+        FileOwnerIndex(entries)
+    results["load_catalog"] = measure(load_catalog, repeat)
+    with open(OPTIONS_FILE) as f:
+        entries = json.load(f)["entries"]
+    owners = FileOwnerIndex(entries)
+
+    index = InstallDirIndex(install_dir)
+    results["scan_install_dir"] = measure(index.rebuild, repeat)
+    results["check_install_dir"] = measure(index.ensure_fresh, repeat)
+
+    # refresh_tree_icons: statuses of every entry, first and memoized
+    engine = None
+
+    def new_engine():
+        nonlocal engine
+        engine = EntryStatusEngine(lambda item: index.has_all(item.get("files", [])),
+                                   lambda: (install_dir, index.generation))
+    pairs = list(enumerate(entries))
+    results["entry_status_cold"] = measure(lambda: engine.statuses(pairs), repeat, setup=new_engine)
+    results["entry_status_warm"] = measure(lambda: engine.statuses(pairs), repeat)
+
+    # auto_resize_tree_column: widest title, from scratch and after one rename
+    tracker = TextWidthTracker()
+    titles = {i: "   " + item["title"] for i, item in pairs}
+
+    def new_tracker():
+        nonlocal tracker
+        tracker = TextWidthTracker()
+        tracker.set_font("benchmark", lambda text: 7 * len(text))
+
+    def rename_one():
+        titles[0] = titles[0] + "!" if not titles[0].endswith("!") else titles[0][:-1]
+    results["tree_width_full"] = measure(lambda: (tracker.sync(titles), tracker.max_width()), repeat, setup=new_tracker)
+    results["tree_width_rename"] = measure(lambda: (tracker.sync(titles), tracker.max_width()), repeat, setup=rename_one)
+
+    # show_preview: first view ever, after a restart (thumbnails on disk) and from memory
+    preview_paths = list(dict.fromkeys(item["preview"] for item in entries))
+    cache = None
+
+    def show_previews():
+        for path in preview_paths:
+            cache.make_scaled(path, *PREVIEW_BOX)
+
+    def cold_cache():
+        nonlocal cache
+        shutil.rmtree(PREVIEW_CACHE_DIR, ignore_errors=True)
+        cache = PreviewCache(thumbnails=ThumbnailStore(PREVIEW_CACHE_DIR))
+
+    def restarted_cache():
+        nonlocal cache
+        cache = PreviewCache(thumbnails=ThumbnailStore(PREVIEW_CACHE_DIR))
+    results["preview_cold"] = measure(show_previews, repeat, setup=cold_cache)
+    results["preview_thumbnails"] = measure(show_previews, repeat, setup=restarted_cache)
+    results["preview_memory"] = measure(show_previews, repeat)
+    results["preview_cache_bytes"] = cache.stats()["total_bytes"]
+
+    # install_or_uninstall: one option into an empty directory, from the
+    # archive, from the extract store and again when already installed
+    ledger = InstallLedger(LEDGER_FILE)
+    selected = entries[0]
+
+    def install():
+        job = run_job(create_install_job(settings, install_dir, [], selected["zip_path"], ledger, STORE_DIR))
+        record_install_result(ledger, index, job, selected, [])
+
+    def uninstall():
+        index.ensure_fresh()
+        job = run_job(create_install_job(settings, install_dir, installed_files(index, selected["files"]),
+                                         None, ledger, STORE_DIR))
+        record_install_result(ledger, index, job, selected, [selected])
+
+    def clean_install_dir():
+        shutil.rmtree(install_dir, ignore_errors=True)
+        os.makedirs(install_dir)
+        shutil.rmtree(STORE_DIR, ignore_errors=True)
+        ledger.set_install_dir(None)  # Forget every record
+        index.invalidate()
+    results["install_cold"] = measure(install, repeat, setup=clean_install_dir)
+    results["uninstall"] = measure(uninstall, repeat, setup=install)
+    results["install_from_store"] = measure(install, repeat, setup=uninstall)
+    results["reinstall_unchanged"] = measure(install, repeat)  # Every file already matches
+
+    # Presets: plan and apply several options at once, then verify them
+    preset = list(range(min(PRESET_SIZE, len(entries))))
+
+    def plan():
+        index.ensure_fresh()
+        return plan_install(install_dir, index, owners, preset, ledger.known_files(install_dir), ledger=ledger)
+
+    def apply():
+        job = run_job(create_plan_job(settings, plan(), STORE_DIR))
+        record_plan_result(ledger, index, job)
+    results["plan_preset"] = measure(plan, repeat, setup=clean_install_dir)
+    results["apply_preset"] = measure(apply, repeat, setup=clean_install_dir)
+
+    def verify():
+        index.ensure_fresh()
+        positions = installed_entry_positions(entries, index, ledger)
+        run_job(create_verify_job(settings, install_dir, entries, positions, False, STORE_DIR))
+    results["verify_installed"] = measure(verify, repeat)
+
+    results["peak_memory_bytes"] = process_memory()[1]
+    return results
+
+
+def run_selector_benchmarks(repeat=5):
+    """
+    Time the selector's own methods against a withdrawn Tk root, in the
+    current folder (a generated catalog). The window is never shown, so the
+    preview canvas has no size: show_preview covers the details and button
+    update, while decoding is timed by run_core_benchmarks. Needs the
+    selector's platform (it takes its single-instance lock on import).
+    """
+    from tkinter import Tk
+    import mod_option_selector as selector
+
+    root = Tk()
+    root.withdraw()
+    app = selector.ModOptionSelectorApp(root)
+
+    def pump(done, timeout=300):
+        # Process Tk events until done() is true; only called from within mainloop(),
+        # where the worker threads can hand their results over with master.after
+        deadline = time.perf_counter() + timeout
+        while not done():
+            if time.perf_counter() > deadline:
+                raise TimeoutError("The selector did not finish in time")
+            root.update()
+            time.sleep(0.001)
+
+    results = {}
+    errors = []
+
+    def run():
+        try:
+            pump(lambda: not app.install_check_pending)
+            results["reload_zip_data"] = measure(app.reload_zip_data, repeat)
+            results["refresh_tree_icons_changed"] = measure(app.refresh_tree_icons, repeat,
+                                                            setup=app.install_index.invalidate)
+            results["refresh_tree_icons"] = measure(app.refresh_tree_icons, repeat)
+
+            iids = app.tree_iids[:max(1, repeat)]
+            steps = iter(iids * repeat)
+
+            def select_next():
+                app.select_entry(next(steps))
+            results["show_preview"] = measure(lambda: app.show_preview(None), repeat, setup=select_next)
+
+            # Install, then uninstall, the first option, waiting for each job
+            def install_or_uninstall():
+                app.install_or_uninstall()
+                pump(lambda: app.install_job is None)
+            app.select_entry(app.tree_iids[0])
+            results["install_or_uninstall"] = measure(install_or_uninstall, repeat * 2)
+        except Exception as e:
+            errors.append(e)
+        finally:
+            root.quit()
+
+    # The steps run from a callback, so the main loop is running
+    root.after(0, run)
+    try:
+        root.mainloop()
+    finally:
+        app.options_watcher.stop()
+        app.preview_loader.shutdown()
+        root.destroy()
+    if errors:
+        raise errors[0]
+    return results
+
+
+def parse_size(text):
+    """
+    Parse a WIDTHxHEIGHT preview size.
+    """
+    width, height = text.lower().split("x")
+    return int(width), int(height)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="mod_option_benchmark",
+                                     description="Time the selector's operations on generated catalogs.")
+    parser.add_argument("--entries", default="10,1000,10000",
+                        help="comma-separated catalog sizes to benchmark (default: 10,1000,10000)")
+    parser.add_argument("--files", type=int, default=5, help="files per option (default: 5)")
+    parser.add_argument("--file-size", type=int, default=4096, help="bytes per file (default: 4096)")
+    parser.add_argument("--shared-files", type=int, default=1, help="files every option shares (default: 1)")
+    parser.add_argument("--preview-size", type=parse_size, default=(1920, 1080), help="preview size (default: 1920x1080)")
+    parser.add_argument("--previews", type=int, default=10, help="distinct preview images (default: 10)")
+    parser.add_argument("--compression", choices=("deflated", "stored"), default="deflated")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per operation (default: 5)")
+    parser.add_argument("--tk", action="store_true", help="also time the selector itself against a withdrawn window")
+    parser.add_argument("--output", help="write the JSON results to this file instead of printing them")
+    parser.add_argument("--keep", action="store_true", help="keep the generated catalogs")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    start_dir = os.getcwd()
+    report = {
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "parameters": {key: value for key, value in vars(args).items() if key not in ("output", "keep")},
+        "catalogs": []
+    }
+
+    for count in [int(n) for n in args.entries.split(",") if n.strip()]:
+        root = tempfile.mkdtemp(prefix=f"mod_option_benchmark_{count}_")
+        try:
+            start = time.perf_counter()
+            generate_catalog(root, count, args.files, args.file_size, args.preview_size,
+                             args.previews, args.compression, args.shared_files)
+            result = {"entries": count, "generate_s": round(time.perf_counter() - start, 3)}
+            print(f"Benchmarking {count} entries in {root}", file=sys.stderr)
+            os.chdir(root)
+            result["core"] = run_core_benchmarks(args.repeat)
+            if args.tk:
+                result["selector"] = run_selector_benchmarks(args.repeat)
+            report["catalogs"].append(result)
+        finally:
+            os.chdir(start_dir)
+            if not args.keep:
+                shutil.rmtree(root, ignore_errors=True)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
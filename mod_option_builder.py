@@ -13,7 +13,8 @@ from tkinter import (  # GUI components from tkinter
     Tk, ttk, Frame, Label, Entry, Button, Listbox, Scrollbar, END, SINGLE,
     filedialog, messagebox, StringVar, Toplevel, Canvas, Text
 )
-from PIL import Image, ImageTk  # For handling and displaying image previews
+from PIL import ImageTk  # For displaying image previews
+from mod_option_preview import open_image  # For decoding previews at reduced size
 
 # Define a lock file path in temp directory to prevent multiple app instances
 lock_file_path = os.path.join(tempfile.gettempdir(), "mod_options_builder.lock")
@@ -413,7 +414,7 @@ class JsonBuilderApp:
         if not path or not os.path.exists(path):
             path = DEFAULT_IMAGE
         try:
-            img = Image.open(path)
+            img, _ = open_image(path, 200, 200)  # Decode no larger than needed
             img.thumbnail((200, 200))
             self.current_image = ImageTk.PhotoImage(img)
             self.canvas.delete("all")
@@ -922,6 +923,9 @@ class JsonBuilderApp:
             def ignore_builder_folder(dir, files):
                 if os.path.normpath(dir).endswith(os.path.normpath("data/assets")):
                     return ["options_builder"]
+                if os.path.normpath(dir) == os.path.normpath(src_data):
+                    # Per-user install state and caches must not ship with the mod
+                    return [f for f in files if f.startswith("install_ledger.json") or f == ".cache"]
                 return []
 
             shutil.copytree(src_data, dst_data, ignore=ignore_builder_folder)
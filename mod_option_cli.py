@@ -0,0 +1,424 @@
+# Headless command-line interface for the Mod Option Selector
+import argparse        # For parsing commands and options
+import json            # For reading settings/mod options and --json output
+import os              # For file and path operations
+import shlex           # For splitting batch command lines
+import sys             # For exit codes and reading batch commands from stdin
+import tempfile        # To get temp directory for lock file
+from mod_option_core import (  # Install state, jobs and entry status (no tkinter or PIL)
+    InstallDirIndex, InstallLedger, StagedInstall, normalize_rel_path, EntryStatusEngine, FileOwnerIndex,
+    installed_files, other_installed_entries, create_install_job, record_install_result,
+    plan_install, create_plan_job, record_plan_result, installed_entry_positions, create_verify_job,
+    record_verify_result
+)
+
+# File paths shared with the selector
+SETTINGS_FILE = 'data/settings.json'
+OPTIONS_FILE = 'data/mod_options.json'
+LEDGER_FILE = 'data/install_ledger.json'
+STORE_DIR = 'data/.cache/store'
+
+# Same lock file as the selector, so the window and a script never install at once
+lock_file_path = os.path.join(tempfile.gettempdir(), "mod_option_selector.lock")
+
+
+class CliError(Exception):
+    """
+    A command could not be carried out; reported without a traceback.
+    """
+
+
+def load_json(path, default):
+    """
+    Load a JSON file, returning default if it is missing or invalid.
+    """
+    if not os.path.exists(path):
+        return default
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Error loading {path}: {e}", file=sys.stderr)
+        return default
+
+
+class SelectorSession:
+    """
+    State shared by every command in one run: settings, entries, the install
+    ledger and a snapshot of the install directory. Batching commands in one
+    session means the install directory is scanned once and then only
+    re-checked (one stat per folder) before each command.
+    """
+    def __init__(self, install_dir=None):
+        self.settings = load_json(SETTINGS_FILE, {})
+        if install_dir:
+            self.settings["install_dir"] = install_dir
+        self.entries = load_json(OPTIONS_FILE, {}).get("entries", [])
+        self.file_owners = FileOwnerIndex(self.entries)
+        self.ledger = InstallLedger(LEDGER_FILE)
+        self.ledger.load()
+        self.index = InstallDirIndex(self.install_dir)
+        self.entry_status = EntryStatusEngine(self.is_installed, lambda: (self.install_dir, self.index.generation))
+        self.lock_file = None
+
+    @property
+    def install_dir(self):
+        return self.settings.get("install_dir", "")
+
+    def refresh(self):
+        """
+        Bring the install directory snapshot up to date.
+        """
+        self.index.ensure_fresh()
+
+    def is_installed(self, item):
+        return bool(self.install_dir) and self.index.has_all(item.get("files", []))
+
+    def find(self, title):
+        """
+        Return (index, entry) for a title; an exact match wins over a
+        case-insensitive one.
+        """
+        for i, item in enumerate(self.entries):
+            if item.get("title") == title:
+                return i, item
+        for i, item in enumerate(self.entries):
+            if item.get("title", "").lower() == title.lower():
+                return i, item
+        raise CliError(f"No option titled '{title}'")
+
+    def describe(self, i, item):
+        """
+        Return the status of an entry as a plain dict for output.
+        """
+        status = self.entry_status.status(i, item)
+        if not status["has_files"]:
+            state = "no files"
+        else:
+            state = "installed" if status["installed"] else "not installed"
+        return {"title": item.get("title", ""), "state": state, "warnings": status["warnings"]}
+
+    def list_entries(self):
+        self.refresh()
+        self.entry_status.check_sources()
+        return {"command": "list", "install_dir": self.install_dir,
+                "entries": [self.describe(i, item) for i, item in enumerate(self.entries)]}
+
+    def status(self, titles):
+        self.refresh()
+        self.entry_status.check_sources()
+        found = [self.find(title) for title in titles] if titles else list(enumerate(self.entries))
+        return {"command": "status", "install_dir": self.install_dir,
+                "entries": [self.describe(i, item) for i, item in found]}
+
+    def prepare_changes(self):
+        """
+        Make sure files can be changed: an install directory is set, the
+        selector is not running and any interrupted install is recovered.
+        """
+        if not self.install_dir:
+            raise CliError("No install directory set (use --install-dir or set it in the selector)")
+        if self.lock_file is None:
+            self.lock_file = acquire_lock()
+            if StagedInstall.recover(self.install_dir) == "swapping":
+                print("An interrupted install was rolled back.", file=sys.stderr)
+                self.index.invalidate()
+        self.refresh()
+
+    def run_job(self, selected, remove_items, remove_files, zip_path):
+        """
+        Run an install job in this thread and record its result.
+        """
+        job = create_install_job(self.settings, self.install_dir, remove_files, zip_path,
+                                 self.ledger, STORE_DIR)
+        job.run()
+        record_install_result(self.ledger, self.index, job, selected, remove_items)
+        if job.error:
+            name = f"'{selected['title']}'" if selected else "the options"
+            raise CliError(f"Could not {'install' if zip_path else 'uninstall'} {name}: {job.error}")
+        return job
+
+    def install(self, title):
+        self.prepare_changes()
+        selected_index, selected = self.find(title)
+        if not selected.get("files"):
+            raise CliError(f"'{selected['title']}' has no files")
+        if self.index.has_all(selected["files"]):
+            return {"command": "install", "title": selected["title"], "result": "already installed"}
+
+        remove_items, remove_files = [], []
+        overwritten = []
+        if not self.settings.get("CanInstallMultiple", False):
+            # Same as the selector: replace whatever other option is installed
+            remove_items, remove_files = other_installed_entries(self.index, self.file_owners, selected_index, self.ledger)
+        else:
+            # Options sharing installed files with this one get them overwritten
+            occupied = self.file_owners.occupying(self.index, selected_index, self.ledger)
+            overwritten = [self.entries[i].get("title", "") for i in sorted(occupied)]
+        job = self.run_job(selected, remove_items, remove_files, selected["zip_path"])
+        return {"command": "install", "title": selected["title"], "result": "installed",
+                "replaced": [item.get("title", "") for item in remove_items],
+                "overwritten": overwritten,
+                "extracted": len(job.extracted), "skipped": len(job.skipped),
+                "elapsed": round(job.elapsed, 3)}
+
+    def uninstall(self, titles, everything=False):
+        self.prepare_changes()
+        if everything:
+            found = [(i, item) for i, item in enumerate(self.entries) if self.is_installed(item) and item.get("files")]
+        elif titles:
+            found = [self.find(title) for title in titles]
+        else:
+            raise CliError("Give the titles to uninstall, or --all")
+
+        # Like the selector, only fully installed options can be uninstalled. All
+        # are decided before anything is removed (removing one option's files
+        # can take files it shares with the next) and removed in one job
+        installed = {i: item for i, item in found if item.get("files") and self.is_installed(item)}
+        remove_files = {}
+        for item in installed.values():
+            for f in installed_files(self.index, item["files"]):
+                remove_files.setdefault(normalize_rel_path(f), f)
+        removed = set()
+        if installed:
+            job = self.run_job(None, list(installed.values()), list(remove_files.values()), None)
+            removed = set(job.removed)
+            self.refresh()
+
+        results = []
+        for i, item in found:
+            if i not in installed:
+                results.append({"title": item.get("title", ""), "result": "not installed"})
+            else:
+                results.append({"title": item.get("title", ""), "result": "uninstalled",
+                                "removed": len(removed.intersection(item["files"]))})
+        return {"command": "uninstall", "entries": results}
+
+    def plan(self, titles):
+        """
+        Work out the minimal changes that leave exactly the given options
+        installed (nothing is changed).
+        """
+        if not self.install_dir:
+            raise CliError("No install directory set (use --install-dir or set it in the selector)")
+        if not titles:
+            raise CliError("Give the titles of the options to install; use uninstall --all to remove every option")
+        self.refresh()
+        positions = []
+        for title in titles:
+            position, item = self.find(title)
+            if not item.get("files"):
+                raise CliError(f"'{item['title']}' has no files")
+            positions.append(position)
+        return plan_install(self.install_dir, self.index, self.file_owners, positions,
+                            self.ledger.known_files(self.install_dir), ledger=self.ledger)
+
+    def apply(self, titles, dry_run=False, show_files=False):
+        """
+        Install exactly the given options (a preset), touching only the files
+        that differ. With dry_run only the plan is reported.
+        """
+        if not dry_run:
+            self.prepare_changes()
+        plan = self.plan(titles)
+        result = {"command": "plan" if dry_run else "apply"}
+        result.update(plan.summary())
+        if show_files:
+            result["operations"] = [{"op": op, "path": path} for op, path in plan.operations()]
+        if dry_run:
+            return result
+
+        job = create_plan_job(self.settings, plan, STORE_DIR)
+        job.run()
+        record_plan_result(self.ledger, self.index, job)
+        if job.error:
+            raise CliError(f"Could not apply the options: {job.error}")
+        result["elapsed"] = round(job.elapsed, 3)
+        return result
+
+    def verify(self, titles, repair=False):
+        """
+        Check the files of the given (default: all installed) options against
+        their archives; with repair, re-extract the damaged ones.
+        """
+        if repair:
+            self.prepare_changes()
+        elif not self.install_dir:
+            raise CliError("No install directory set (use --install-dir or set it in the selector)")
+        self.refresh()
+        if titles:
+            positions = [self.find(title)[0] for title in titles]
+        else:
+            positions = installed_entry_positions(self.entries, self.index, self.ledger)
+
+        job = create_verify_job(self.settings, self.install_dir, self.entries, positions, repair, STORE_DIR)
+        job.run()
+        record_verify_result(self.ledger, self.index, job)
+        if job.error:
+            raise CliError(f"Could not verify the options: {job.error}")
+        return {"command": "verify", "repair": repair,
+                "entries": [self.entries[p].get("title", "") for p in positions],
+                "checked": len(job.plan.members), "ok": len(job.plan.untouched),
+                "problems": [{"path": path, "problem": problem} for path, problem in job.problems],
+                "repaired": len(job.problems) if repair else 0,
+                "elapsed": round(job.elapsed, 3)}
+
+
+def acquire_lock():
+    """
+    Take the selector's single-instance lock (Windows only, like the selector
+    itself). Raises CliError if the selector is running.
+    """
+    try:
+        import msvcrt  # Windows file locking
+    except ImportError:
+        return None
+    lock_file = open(lock_file_path, "w")
+    try:
+        msvcrt.locking(lock_file.fileno(), msvcrt.LK_NBLCK, 1)
+    except OSError:
+        lock_file.close()
+        raise CliError("The Mod Option Selector is running; close it before changing files from the command line")
+    return lock_file
+
+
+def print_result(result, as_json):
+    """
+    Print a command result, as one line of JSON or as readable text.
+    """
+    if as_json:
+        print(json.dumps(result))
+        return
+    if "entries" in result and result["command"] in ("list", "status"):
+        for entry in result["entries"]:
+            warnings = f" (missing: {', '.join(entry['warnings'])})" if entry["warnings"] else ""
+            print(f"[{entry['state']}] {entry['title']}{warnings}")
+    elif result["command"] == "uninstall":
+        for entry in result["entries"]:
+            print(f"{entry['title']}: {entry['result']}")
+    elif result["command"] in ("plan", "apply"):
+        for operation in result.get("operations", []):
+            print(f"{operation['op']:<9} {operation['path']}")
+        verb = "Would" if result["command"] == "plan" else "Did"
+        print(f"{verb} install: {', '.join(result['install']) or 'nothing'}; "
+              f"uninstall: {', '.join(result['uninstall']) or 'nothing'}")
+        print(f"{result['create']} created, {result['overwrite']} overwritten, {result['delete']} deleted, "
+              f"{result['untouched']} untouched ({result['write_bytes'] / (1024 * 1024):.1f} MB written)")
+    elif result["command"] == "verify":
+        for problem in result["problems"]:
+            print(f"{problem['problem']:<10} {problem['path']}")
+        print(f"Checked {result['checked']} files of {len(result['entries'])} options: "
+              f"{len(result['problems'])} damaged or missing" +
+              (f", {result['repaired']} repaired" if result["repair"] else ""))
+    else:
+        replaced = f", replaced {', '.join(result['replaced'])}" if result.get("replaced") else ""
+        overwritten = f", overwrote files of {', '.join(result['overwritten'])}" if result.get("overwritten") else ""
+        print(f"{result['title']}: {result['result']}{replaced}{overwritten}")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="mod_option_cli", description="Manage mod options without the selector window.")
+    parser.add_argument("--json", action="store_true", help="print one JSON object per command")
+    parser.add_argument("--install-dir", help="install directory to use instead of the one in settings.json")
+    parser.add_argument("--root", help="folder containing the data folder (default: current folder)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("list", help="list every option and its status")
+    status = commands.add_parser("status", help="show the status of some or all options")
+    status.add_argument("titles", nargs="*")
+    install = commands.add_parser("install", help="install an option")
+    install.add_argument("title")
+    uninstall = commands.add_parser("uninstall", help="uninstall options")
+    uninstall.add_argument("titles", nargs="*")
+    uninstall.add_argument("--all", action="store_true", help="uninstall every installed option")
+    plan = commands.add_parser("plan", help="show what apply would change, without changing anything")
+    plan.add_argument("titles", nargs="+")
+    plan.add_argument("--files", action="store_true", help="list every file operation")
+    apply = commands.add_parser("apply", help="install exactly these options, touching only files that differ")
+    apply.add_argument("titles", nargs="+")
+    apply.add_argument("--dry-run", action="store_true", help="same as plan")
+    apply.add_argument("--files", action="store_true", help="list every file operation")
+    verify = commands.add_parser("verify", help="check installed files against the archives")
+    verify.add_argument("titles", nargs="*")
+    verify.add_argument("--repair", action="store_true", help="re-extract files that are missing or damaged")
+    batch = commands.add_parser("batch", help="run one command per line from a file (default: stdin)")
+    batch.add_argument("file", nargs="?")
+    return parser
+
+
+def run_command(session, args):
+    if args.command == "list":
+        return session.list_entries()
+    if args.command == "status":
+        return session.status(args.titles)
+    if args.command == "install":
+        return session.install(args.title)
+    if args.command == "uninstall":
+        return session.uninstall(args.titles, args.all)
+    if args.command == "plan":
+        return session.apply(args.titles, dry_run=True, show_files=args.files)
+    if args.command == "apply":
+        return session.apply(args.titles, dry_run=args.dry_run, show_files=args.files)
+    if args.command == "verify":
+        return session.verify(args.titles, args.repair)
+    raise CliError(f"Unknown command '{args.command}'")
+
+
+def read_batch(parser, path=None):
+    """
+    Read and parse every command of a batch file (default: stdin) before any
+    of them runs, so a bad line cannot stop a batch halfway.
+    """
+    try:
+        lines = open(path, 'r') if path else sys.stdin
+        with lines:
+            lines = list(lines)
+    except OSError as e:
+        raise CliError(f"Could not read {path}: {e}")
+
+    commands = []
+    for number, line in enumerate(lines, 1):
+        try:
+            words = shlex.split(line, comments=True)
+        except ValueError as e:
+            raise CliError(f"Line {number}: {e}")
+        if not words:
+            continue
+        try:
+            command = parser.parse_args(words)
+        except SystemExit:
+            # argparse has already printed what was wrong
+            raise CliError(f"Line {number} is not a valid command: {line.strip()}")
+        if command.command == "batch":
+            raise CliError(f"Line {number}: batch cannot be nested")
+        if command.json or command.install_dir or command.root:
+            raise CliError(f"Line {number}: --json, --install-dir and --root can only be given before batch")
+        commands.append(command)
+    return commands
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.root:
+        os.chdir(args.root)
+    session = SelectorSession(args.install_dir)
+
+    try:
+        if args.command != "batch":
+            print_result(run_command(session, args), args.json)
+            return 0
+
+        for command in read_batch(parser, args.file):
+            print_result(run_command(session, command), args.json)
+        return 0
+    except CliError as e:
+        if args.json:
+            print(json.dumps({"error": str(e)}))
+        else:
+            print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,1951 @@
+# Shared, UI-independent logic used by the Mod Option Selector
+import abc             # For the file watcher backend interface
+import concurrent.futures  # For extracting members in parallel
+import ctypes          # For native file change notifications
+import ctypes.util     # To locate libc for inotify
+import hashlib         # For content-addressing archives in the extract store
+import heapq           # For tracking the widest tree row
+import json            # For reading/writing the install ledger
+import mmap            # For copying stored ZIP members without Python buffers
+import os              # For file and path operations
+import select          # For waiting on inotify events
+import shutil          # For removing staging folders
+import struct          # For reading ZIP local file headers
+import sys             # To pick a file watcher backend and report problems on stderr
+import threading       # For running install jobs off the UI thread
+import time            # For install job timing
+import zipfile         # To read mod ZIP archives
+import zlib            # For CRC32 checks of installed files
+
+# Size of the chunks streamed from a ZIP member to disk
+COPY_CHUNK_SIZE = 1024 * 1024
+
+# Layout of a ZIP local file header (signature ... file name length, extra field length)
+LOCAL_HEADER_FORMAT = "<4sHHHHHIIIHH"
+LOCAL_HEADER_SIZE = struct.calcsize(LOCAL_HEADER_FORMAT)
+LOCAL_HEADER_SIGNATURE = b"PK\x03\x04"
+
+# Staging folder (inside the install directory) used for transactional installs
+STAGING_DIR_NAME = ".mod_option_staging"
+STAGED_SUFFIX = ".staged"
+
+# Marker written last when an archive has been fully decompressed into the store
+STORE_COMPLETE_MARKER = ".complete"
+
+
+def normalize_rel_path(path):
+    """
+    Normalize a path relative to the install directory so it can be used as a
+    lookup key (handles trailing slashes from ZIP directory entries, mixed
+    separators and, on Windows, letter case).
+    """
+    return os.path.normcase(os.path.normpath(path))
+
+
+class InstallDirIndex:
+    """
+    Snapshot of every file and folder inside the install directory, stored as a
+    set of normalized relative paths.
+
+    The snapshot is built with a single os.scandir walk and reused for all status
+    queries until the install directory changes. Changes are detected by
+    comparing the modification time of each scanned folder, which costs one
+    stat per folder instead of one stat per file of every entry.
+    """
+    def __init__(self, install_dir=None):
+        self.install_dir = install_dir
+        self.paths = set()       # Normalized relative paths present on disk
+        self.stats = {}          # Normalized relative file path -> (size, mtime_ns)
+        self.dir_mtimes = {}     # Absolute folder path -> mtime when scanned
+        self.built = False
+        self.generation = 0      # Bumped whenever the snapshot is dropped or rebuilt
+
+    def set_install_dir(self, install_dir):
+        """
+        Point the index at a (possibly new) install directory.
+        """
+        if install_dir != self.install_dir:
+            self.install_dir = install_dir
+            self.invalidate()
+
+    def invalidate(self):
+        """
+        Drop the current snapshot so the next query rebuilds it.
+        """
+        self.paths = set()
+        self.stats = {}
+        self.dir_mtimes = {}
+        self.built = False
+        self.generation += 1
+
+    def rebuild(self):
+        """
+        Walk the install directory once and record every relative path found.
+        """
+        self.paths = set()
+        self.stats = {}
+        self.dir_mtimes = {}
+        self.built = True
+        self.generation += 1
+
+        if not self.install_dir or not os.path.isdir(self.install_dir):
+            return
+
+        pending = [""]
+        while pending:
+            rel_dir = pending.pop()
+            abs_dir = os.path.join(self.install_dir, rel_dir) if rel_dir else self.install_dir
+            try:
+                self.dir_mtimes[abs_dir] = os.stat(abs_dir).st_mtime_ns
+                with os.scandir(abs_dir) as it:
+                    for entry in it:
+                        if not rel_dir and entry.name == STAGING_DIR_NAME:
+                            continue  # Transient files of a running install job
+                        rel_path = os.path.join(rel_dir, entry.name) if rel_dir else entry.name
+                        key = normalize_rel_path(rel_path)
+                        self.paths.add(key)
+                        if entry.is_dir(follow_symlinks=False):
+                            pending.append(rel_path)
+                        else:
+                            # On Windows this comes from the directory listing, no extra stat
+                            st = entry.stat(follow_symlinks=False)
+                            self.stats[key] = (st.st_size, st.st_mtime_ns)
+            except OSError as e:
+                print(f"Could not scan {abs_dir}: {e}", file=sys.stderr)
+
+    def is_stale(self):
+        """
+        Return True if the snapshot is missing or any scanned folder has changed.
+        """
+        if not self.built:
+            return True
+        if not self.dir_mtimes:
+            # Install directory did not exist when scanned; check if it does now
+            return bool(self.install_dir) and os.path.isdir(self.install_dir)
+        for abs_dir, mtime in self.dir_mtimes.items():
+            try:
+                if os.stat(abs_dir).st_mtime_ns != mtime:
+                    return True
+            except OSError:
+                return True
+        return False
+
+    def ensure_fresh(self):
+        """
+        Rebuild the snapshot only if it is missing or out of date.
+        """
+        if self.is_stale():
+            self.rebuild()
+
+    def contains(self, rel_path):
+        """
+        Check if a single relative path exists in the snapshot.
+        """
+        return normalize_rel_path(rel_path) in self.paths
+
+    def has_all(self, files):
+        """
+        Check if every relative path in files exists in the snapshot.
+        """
+        return all(normalize_rel_path(f) in self.paths for f in files)
+
+
+class InstallLedger:
+    """
+    Persistent record of what the selector extracted into the install directory.
+
+    For every installed entry (keyed by title) the ledger stores the ZIP it came
+    from and, per extracted file, its size, on-disk mtime and the CRC32 from the
+    ZIP's central directory. This lets the selector show install status at
+    startup without touching the install directory at all.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.install_dir = None
+        self.entries = {}  # Entry key -> {"zip_path": ..., "files": {rel: {...}}}
+        self.generation = 0  # Bumped whenever records change
+        self.owner_cache = (None, {})  # (generation, normalized path -> entry keys)
+
+    @staticmethod
+    def entry_key(item):
+        """
+        Return the key used to identify an entry in the ledger.
+        """
+        return item.get("title", "")
+
+    def load(self):
+        """
+        Load the ledger from disk, starting empty if missing or invalid.
+        """
+        self.install_dir = None
+        self.entries = {}
+        self.generation += 1
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+            self.install_dir = data.get("install_dir")
+            self.entries = data.get("entries", {})
+        except (OSError, ValueError, AttributeError) as e:
+            print(f"Invalid install ledger, starting fresh: {e}", file=sys.stderr)
+
+    def save(self):
+        """
+        Write the ledger to disk, replacing the old file in one step so a crash
+        never leaves a half-written ledger behind.
+        """
+        temp_path = self.path + ".tmp"
+        try:
+            with open(temp_path, 'w') as f:
+                json.dump({"install_dir": self.install_dir, "entries": self.entries}, f, indent=2)
+            os.replace(temp_path, self.path)
+        except OSError as e:
+            print(f"Could not save install ledger: {e}", file=sys.stderr)
+
+    def set_install_dir(self, install_dir):
+        """
+        Records only apply to one install directory; switching drops them.
+        """
+        if install_dir != self.install_dir:
+            self.install_dir = install_dir
+            self.entries = {}
+            self.generation += 1
+
+    def record_install(self, item, install_dir, files):
+        """
+        Record the files just extracted for item into install_dir.
+        files maps each ZIP member name to the dict from file_record().
+        The files now belong to item, so they are dropped from the records of
+        other entries (entries left without files are forgotten).
+        """
+        self.set_install_dir(install_dir)
+        key = self.entry_key(item)
+        written = {normalize_rel_path(name) for name in files}
+        for other_key, record in list(self.entries.items()):
+            if other_key == key:
+                continue
+            kept = {name: meta for name, meta in record.get("files", {}).items()
+                    if normalize_rel_path(name) not in written}
+            if len(kept) != len(record.get("files", {})):
+                if kept:
+                    record["files"] = kept
+                else:
+                    del self.entries[other_key]
+        self.entries[key] = {
+            "zip_path": item.get("zip_path", ""),
+            "files": files
+        }
+        self.generation += 1
+
+    def known_files(self, install_dir):
+        """
+        Return every recorded file in install_dir as a dict of normalized
+        relative path -> file_record(), for incremental installs.
+        """
+        if not install_dir or install_dir != self.install_dir:
+            return {}
+        known = {}
+        for record in self.entries.values():
+            for rel_path, meta in record.get("files", {}).items():
+                known[normalize_rel_path(rel_path)] = meta
+        return known
+
+    def file_owners(self, install_dir):
+        """
+        Return {normalized path: set of entry keys recorded for it} for
+        install_dir, rebuilt only when the records changed.
+        """
+        if not install_dir or install_dir != self.install_dir:
+            return {}
+        generation, owners = self.owner_cache
+        if generation != self.generation:
+            owners = {}
+            for key, record in self.entries.items():
+                for rel_path in record.get("files", {}):
+                    owners.setdefault(normalize_rel_path(rel_path), set()).add(key)
+            self.owner_cache = (self.generation, owners)
+        return owners
+
+    def forget(self, item):
+        """
+        Remove an entry's record (after it was uninstalled).
+        """
+        self.entries.pop(self.entry_key(item), None)
+        self.generation += 1
+
+    def is_recorded(self, item, install_dir):
+        """
+        Check if the ledger says this entry is installed in install_dir.
+        """
+        if not install_dir or install_dir != self.install_dir:
+            return False
+        record = self.entries.get(self.entry_key(item))
+        return bool(record) and record.get("zip_path", "") == item.get("zip_path", "")
+
+    def find_drift(self, index):
+        """
+        Compare the ledger against an install directory snapshot and return the
+        keys of entries whose files are missing or were changed on disk.
+        """
+        if index.install_dir != self.install_dir:
+            return list(self.entries)
+
+        drifted = []
+        for key, record in self.entries.items():
+            for rel_path, meta in record.get("files", {}).items():
+                stat = index.stats.get(normalize_rel_path(rel_path))
+                if stat is None or stat != (meta.get("size"), meta.get("mtime")):
+                    drifted.append(key)
+                    break
+        return drifted
+
+
+def file_record(info, path):
+    """
+    Build the ledger record for a ZIP member that was written to path.
+    """
+    return {
+        "size": info.file_size,
+        "mtime": os.stat(path).st_mtime_ns,
+        "crc": info.CRC
+    }
+
+
+def file_crc32(path, cancel_event=None, on_chunk=None):
+    """
+    Compute the CRC32 of a file on disk, reading it in chunks into one reused
+    buffer so memory use stays flat for large files. on_chunk(byte_count) is
+    called after each chunk.
+    """
+    crc = 0
+    buffer = bytearray(COPY_CHUNK_SIZE)
+    view = memoryview(buffer)
+    with open(path, "rb", buffering=0) as f:
+        while True:
+            if cancel_event is not None and cancel_event.is_set():
+                raise InstallCancelled()
+            count = f.readinto(buffer)
+            if not count:
+                break
+            crc = zlib.crc32(view[:count], crc)
+            if on_chunk:
+                on_chunk(count)
+    return crc
+
+
+def member_unchanged(info, target, known=None, cancel_event=None):
+    """
+    Check if the file at target already holds exactly the contents of the ZIP
+    member described by info.
+
+    If the ledger knows the file (known) and the file on disk still has the
+    size and mtime recorded there, the recorded CRC is compared without reading
+    the file. Otherwise a file of the right size is read once and its CRC32 is
+    compared with the one from the ZIP's central directory.
+    """
+    try:
+        st = os.stat(target)
+    except OSError:
+        return False
+    if st.st_size != info.file_size:
+        return False
+    if known and known.get("size") == st.st_size and known.get("mtime") == st.st_mtime_ns:
+        return known.get("crc") == info.CRC
+    return file_crc32(target, cancel_event) == info.CRC
+
+
+def stored_data_offset(archive, info):
+    """
+    Return the offset of a member's raw data inside the open archive file,
+    read from its local file header.
+    """
+    archive.seek(info.header_offset)
+    header = archive.read(LOCAL_HEADER_SIZE)
+    fields = struct.unpack(LOCAL_HEADER_FORMAT, header)
+    if fields[0] != LOCAL_HEADER_SIGNATURE:
+        raise zipfile.BadZipFile(f"Bad local file header for {info.filename}")
+    name_length, extra_length = fields[9], fields[10]
+    return info.header_offset + LOCAL_HEADER_SIZE + name_length + extra_length
+
+
+def copy_stored_member(zip_path, info, dest, on_chunk=None, cancel_event=None):
+    """
+    Copy an uncompressed (ZIP_STORED) member straight out of the archive.
+
+    The member's byte range is memory-mapped and written to dest in slices, so
+    no Python buffers are allocated and the data is only read once; the CRC32
+    is checked on the same slices.
+    """
+    with open(zip_path, "rb") as archive:
+        offset = stored_data_offset(archive, info)
+        # mmap offsets must be a multiple of the allocation granularity
+        aligned = offset - (offset % mmap.ALLOCATIONGRANULARITY)
+        skip = offset - aligned
+        crc = 0
+        with mmap.mmap(archive.fileno(), skip + info.file_size, access=mmap.ACCESS_READ, offset=aligned) as mapped, \
+                open(dest, "wb") as dst:
+            view = memoryview(mapped)
+            try:
+                for start in range(skip, skip + info.file_size, COPY_CHUNK_SIZE):
+                    if cancel_event is not None and cancel_event.is_set():
+                        raise InstallCancelled()
+                    chunk = view[start:min(start + COPY_CHUNK_SIZE, skip + info.file_size)]
+                    crc = zlib.crc32(chunk, crc)
+                    dst.write(chunk)
+                    if on_chunk:
+                        on_chunk(len(chunk))
+                    chunk.release()
+            finally:
+                view.release()
+    if crc != info.CRC:
+        raise zipfile.BadZipFile(f"Bad CRC-32 for file {info.filename}")
+
+
+def copy_member(zip_ref, info, dest, on_chunk=None, cancel_event=None):
+    """
+    Stream a single ZIP member to dest in chunks, calling on_chunk(byte_count)
+    after each one and stopping if cancel_event gets set. Uncompressed members
+    take the memory-mapped fast path.
+    """
+    os.makedirs(os.path.dirname(dest), exist_ok=True)
+    if (info.compress_type == zipfile.ZIP_STORED and info.file_size > 0
+            and not info.flag_bits & 0x1 and isinstance(zip_ref.filename, str)):
+        copy_stored_member(zip_ref.filename, info, dest, on_chunk, cancel_event)
+        return
+    with zip_ref.open(info) as src, open(dest, "wb") as dst:
+        while True:
+            if cancel_event is not None and cancel_event.is_set():
+                raise InstallCancelled()
+            chunk = src.read(COPY_CHUNK_SIZE)
+            if not chunk:
+                break
+            dst.write(chunk)
+            if on_chunk:
+                on_chunk(len(chunk))
+
+
+def resolve_worker_count(workers):
+    """
+    Turn the ExtractWorkers setting into a thread count (0 or less means one
+    per CPU core).
+    """
+    try:
+        workers = int(workers)
+    except (TypeError, ValueError):
+        workers = 0
+    return workers if workers > 0 else (os.cpu_count() or 1)
+
+
+def split_by_compressed_size(members, buckets):
+    """
+    Split (ZipInfo, dest) pairs into at most `buckets` groups of roughly equal
+    compressed size (largest members first, each to the lightest group).
+    """
+    groups = [[] for _ in range(max(1, min(buckets, len(members))))]
+    loads = [0] * len(groups)
+    for pair in sorted(members, key=lambda pair: pair[0].compress_size, reverse=True):
+        lightest = loads.index(min(loads))
+        groups[lightest].append(pair)
+        loads[lightest] += pair[0].compress_size
+    return groups
+
+
+def extract_members(zip_ref, members, workers=1, on_chunk=None, cancel_event=None):
+    """
+    Extract (ZipInfo, dest) pairs from an open ZipFile.
+
+    With more than one worker, the members are split by compressed size and
+    each group is extracted on its own thread through its own ZipFile handle,
+    so decompression (which releases the GIL) and disk writes overlap. on_chunk
+    must be thread-safe in that case. The first error stops the other workers
+    and is raised; cancel_event raises InstallCancelled.
+    """
+    workers = min(workers, len(members))
+    if workers <= 1:
+        for info, dest in members:
+            copy_member(zip_ref, info, dest, on_chunk, cancel_event)
+        return
+
+    abort = threading.Event()
+
+    def extract_group(group):
+        with zipfile.ZipFile(zip_ref.filename, 'r') as own_ref:
+            for info, dest in group:
+                if abort.is_set():
+                    raise InstallCancelled()
+                copy_member(own_ref, info, dest, on_chunk, abort)
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = {pool.submit(extract_group, group) for group in split_by_compressed_size(members, workers)}
+        error = None
+        while pending:
+            done, pending = concurrent.futures.wait(pending, timeout=0.1, return_when=concurrent.futures.FIRST_EXCEPTION)
+            if cancel_event is not None and cancel_event.is_set():
+                abort.set()
+            for future in done:
+                exc = future.exception()
+                if exc is not None and not isinstance(exc, InstallCancelled) and error is None:
+                    error = exc
+                    abort.set()
+        if error is not None:
+            raise error
+        if abort.is_set():
+            raise InstallCancelled()
+
+
+def member_target_path(install_dir, info):
+    """
+    Return where a ZIP member is extracted to inside install_dir, sanitizing the
+    member name the same way ZipFile.extract does (no absolute paths, drive
+    letters or '..' components).
+    """
+    arcname = info.filename.replace('/', os.path.sep)
+    if os.path.altsep:
+        arcname = arcname.replace(os.path.altsep, os.path.sep)
+    arcname = os.path.splitdrive(arcname)[1]
+    parts = [p for p in arcname.split(os.path.sep) if p not in ('', os.path.curdir, os.path.pardir)]
+    return os.path.join(install_dir, *parts)
+
+
+class InstallCancelled(Exception):
+    """
+    Raised inside an install job when the user cancelled it.
+    """
+
+
+class ExtractStore:
+    """
+    Content-addressed cache of decompressed mod archives.
+
+    Each archive is decompressed once into a folder named after a digest of its
+    central directory (member names, sizes and CRC32s), so identical archives
+    share one copy no matter where they live, and computing the key never reads
+    the compressed data. Installs then hardlink files out of the store, or copy
+    them when a link is not possible (e.g. the store is on another volume).
+    Linked files share their data with the store: the selector only replaces
+    them through a rename, but another tool patching an installed file in
+    place changes the stored copy too. The completion marker therefore lists
+    each stored file's size and mtime, and intact() checks them before a file
+    is linked again.
+    Only the newest copy of each archive path is kept.
+    """
+    def __init__(self, root):
+        self.root = root
+        self.index_path = os.path.join(root, "index.json")
+        self.records = {}  # Digest -> {normalized path: [size, mtime_ns]} from the marker
+
+    @staticmethod
+    def archive_digest(zip_ref):
+        """
+        Return the content key of an open ZipFile.
+        """
+        digest = hashlib.sha1()
+        for info in sorted(zip_ref.infolist(), key=lambda i: i.filename):
+            digest.update(f"{info.filename}\0{info.file_size}\0{info.CRC}\n".encode("utf-8"))
+        return digest.hexdigest()
+
+    def entry_dir(self, digest):
+        return os.path.join(self.root, digest)
+
+    def has(self, digest):
+        """
+        Check if the archive with this digest is fully decompressed in the store.
+        """
+        return os.path.exists(os.path.join(self.entry_dir(digest), STORE_COMPLETE_MARKER))
+
+    def populate(self, zip_ref, digest, on_chunk=None, cancel_event=None, workers=1):
+        """
+        Decompress every member of zip_ref into the store (using `workers`
+        threads). The archive only becomes visible once it is complete, so a
+        cancelled or failed run never leaves a half-filled entry behind.
+        """
+        temp_dir = self.entry_dir(digest) + ".partial"
+        shutil.rmtree(temp_dir, ignore_errors=True)
+        try:
+            files = []
+            for info in zip_ref.infolist():
+                target = member_target_path(temp_dir, info)
+                if info.is_dir():
+                    os.makedirs(target, exist_ok=True)
+                else:
+                    files.append((info, target))
+            extract_members(zip_ref, files, workers, on_chunk, cancel_event)
+            records = {}
+            for info, target in files:
+                st = os.stat(target)
+                records[normalize_rel_path(os.path.relpath(target, temp_dir))] = [st.st_size, st.st_mtime_ns]
+            with open(os.path.join(temp_dir, STORE_COMPLETE_MARKER), "w") as f:
+                json.dump(records, f)
+            self.records.pop(digest, None)
+            if self.has(digest):
+                shutil.rmtree(temp_dir, ignore_errors=True)  # Populated meanwhile
+            else:
+                shutil.rmtree(self.entry_dir(digest), ignore_errors=True)
+                os.replace(temp_dir, self.entry_dir(digest))
+        except BaseException:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+            raise
+
+    def intact(self, digest, rel_path):
+        """
+        Check that the stored copy of rel_path still has the size and mtime
+        recorded when it was decompressed (entries from before the records
+        existed never pass).
+        """
+        records = self.records.get(digest)
+        if records is None:
+            try:
+                with open(os.path.join(self.entry_dir(digest), STORE_COMPLETE_MARKER), 'r') as f:
+                    records = json.load(f)
+            except (OSError, ValueError):
+                records = {}
+            self.records[digest] = records
+        try:
+            st = os.stat(os.path.join(self.entry_dir(digest), rel_path))
+        except OSError:
+            return False
+        return records.get(normalize_rel_path(rel_path)) == [st.st_size, st.st_mtime_ns]
+
+    def materialise(self, digest, rel_path, dest):
+        """
+        Create dest from the stored copy of rel_path: a hardlink when the file
+        system allows it, otherwise a plain copy. Returns True if linked.
+        """
+        src = os.path.join(self.entry_dir(digest), rel_path)
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        try:
+            os.link(src, dest)
+            return True
+        except OSError:
+            shutil.copyfile(src, dest)
+            return False
+
+    def discard(self, digest):
+        """
+        Drop the stored copy of an archive, e.g. after files linked from it
+        were found damaged (they share their data with the store).
+        """
+        shutil.rmtree(self.entry_dir(digest), ignore_errors=True)
+        self.records.pop(digest, None)
+
+    def remember(self, zip_path, digest):
+        """
+        Note that zip_path currently holds digest and drop the store entry of
+        the archive's previous contents, unless another archive still uses it.
+        """
+        index = {}
+        try:
+            with open(self.index_path, 'r') as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            pass
+
+        key = os.path.normcase(os.path.abspath(zip_path))
+        old_digest = index.get(key)
+        index[key] = digest
+        if old_digest and old_digest != digest and old_digest not in index.values():
+            shutil.rmtree(self.entry_dir(old_digest), ignore_errors=True)
+
+        try:
+            os.makedirs(self.root, exist_ok=True)
+            with open(self.index_path, 'w') as f:
+                json.dump(index, f, indent=2)
+        except OSError as e:
+            print(f"Could not save extract store index: {e}", file=sys.stderr)
+
+
+class StagedInstall:
+    """
+    A transactional set of file changes in the install directory.
+
+    New files are first written into a staging folder inside the install
+    directory (so they are on the same volume), with a ".staged" suffix so the
+    game never loads them. commit() then moves every file that gets replaced or
+    removed into a backup folder and renames the staged files into place. A
+    journal written before the first rename lets recover() roll an interrupted
+    swap back on the next start; backups are deleted once the swap is complete.
+    """
+    def __init__(self, install_dir):
+        self.install_dir = install_dir
+        self.root = os.path.join(install_dir, STAGING_DIR_NAME)
+        self.journal_path = os.path.join(self.root, "journal.json")
+        self.ops = []  # {"rel": ..., "new": bool, "backup": bool}
+
+    def staged_path(self, rel_path):
+        return os.path.join(self.root, "new", rel_path) + STAGED_SUFFIX
+
+    def backup_path(self, rel_path):
+        return os.path.join(self.root, "backup", rel_path) + STAGED_SUFFIX
+
+    def target_path(self, rel_path):
+        return os.path.join(self.install_dir, rel_path)
+
+    def prepare(self):
+        """
+        Create an empty staging folder, recovering any previous transaction first.
+        """
+        StagedInstall.recover(self.install_dir)
+        os.makedirs(self.root, exist_ok=True)
+
+    def write_journal(self, state):
+        """
+        Durably record the transaction state before changing anything in place.
+        """
+        temp_path = self.journal_path + ".tmp"
+        with open(temp_path, 'w') as f:
+            json.dump({"state": state, "ops": self.ops}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.journal_path)
+
+    def commit(self, new_files, remove_files, new_dirs=()):
+        """
+        Swap the staged new_files into place and take remove_files out, all or
+        nothing. Paths are relative to the install directory. Returns the
+        relative paths that were removed.
+        """
+        self.ops = []
+        for rel_path in new_files:
+            self.ops.append({"rel": rel_path, "new": True,
+                             "backup": os.path.lexists(self.target_path(rel_path))})
+        replaced = {normalize_rel_path(rel_path) for rel_path in new_files}
+        for rel_path in remove_files:
+            if normalize_rel_path(rel_path) in replaced:
+                continue  # Already backed up and replaced by a new file
+            if os.path.isfile(self.target_path(rel_path)):
+                self.ops.append({"rel": rel_path, "new": False, "backup": True})
+
+        self.write_journal("swapping")
+        try:
+            for rel_path in new_dirs:
+                os.makedirs(self.target_path(rel_path), exist_ok=True)
+            for op in self.ops:
+                target = self.target_path(op["rel"])
+                if op["backup"]:
+                    backup = self.backup_path(op["rel"])
+                    os.makedirs(os.path.dirname(backup), exist_ok=True)
+                    os.replace(target, backup)
+                if op["new"]:
+                    os.makedirs(os.path.dirname(target), exist_ok=True)
+                    os.replace(self.staged_path(op["rel"]), target)
+        except BaseException:
+            self.rollback()
+            raise
+
+        self.write_journal("committed")
+        self.finish()
+        return [op["rel"] for op in self.ops if not op["new"]]
+
+    def rollback(self):
+        """
+        Undo a partially applied swap. Safe to run more than once.
+        """
+        for op in reversed(self.ops):
+            target = self.target_path(op["rel"])
+            try:
+                if op["new"] and not os.path.exists(self.staged_path(op["rel"])) and os.path.lexists(target):
+                    os.remove(target)  # The staged file was already moved into place
+                backup = self.backup_path(op["rel"])
+                if op["backup"] and os.path.exists(backup):
+                    os.replace(backup, target)
+            except OSError as e:
+                print(f"Could not roll back {target}: {e}", file=sys.stderr)
+        self.finish()
+
+    def finish(self):
+        """
+        Delete the staging folder (staged leftovers, backups and journal).
+        """
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    @staticmethod
+    def recover(install_dir):
+        """
+        Clean up after a transaction that did not finish, e.g. because the app
+        was closed or crashed mid-install. An interrupted swap is rolled back,
+        a committed one is completed. Returns the recovered state or None.
+        """
+        if not install_dir:
+            return None
+        staged = StagedInstall(install_dir)
+        if not os.path.isdir(staged.root):
+            return None
+
+        state = "staged"
+        try:
+            with open(staged.journal_path, 'r') as f:
+                journal = json.load(f)
+            state = journal.get("state", "staged")
+            staged.ops = journal.get("ops", [])
+        except (OSError, ValueError):
+            pass  # No journal: nothing was moved into place yet
+
+        if state == "swapping":
+            print("Rolling back an interrupted install...", file=sys.stderr)
+            staged.rollback()
+        else:
+            staged.finish()
+        return state
+
+
+class InstallJob:
+    """
+    One install, uninstall or replace operation run on a worker thread.
+
+    The job streams the members of the ZIP (if zip_path is set) in chunks into
+    a StagedInstall, then swaps them into place and takes remove_files out in
+    one transaction. Progress is exposed through done_bytes/total_bytes/message
+    so the UI can poll it, and cancel() stops the job between chunks. When the
+    job ends, on_done(job) is called from the worker thread; the caller is
+    responsible for handing the result back to its own thread.
+
+    In incremental mode, members whose size and CRC32 already match the file on
+    disk are left untouched (known_files holds ledger records used to avoid
+    reading them), and files scheduled for removal that the ZIP provides again
+    are kept rather than deleted and re-extracted.
+
+    With an ExtractStore, the archive is decompressed into the store once and
+    later installs only link or copy files out of it. Decompression uses
+    `workers` threads (see extract_members).
+
+    If the job fails or is cancelled, the install directory is left unchanged.
+    """
+    def __init__(self, install_dir, remove_files=(), zip_path=None, on_done=None,
+                 incremental=False, known_files=None, store=None, workers=1):
+        self.install_dir = install_dir
+        self.remove_files = list(remove_files)
+        self.zip_path = zip_path
+        self.on_done = on_done
+        self.incremental = incremental
+        self.known_files = known_files or {}
+        self.store = store
+        self.workers = max(1, workers)
+
+        self.cancel_event = threading.Event()
+        self.thread = None
+        self.staging = StagedInstall(install_dir)
+
+        # Progress, read by the UI while the job runs
+        self.progress_lock = threading.Lock()
+        self.done_bytes = 0
+        self.total_bytes = 0
+        self.message = ""
+
+        # Results
+        self.removed = []       # Relative paths removed from the install directory
+        self.extracted = {}     # ZIP member name -> file_record()
+        self.skipped = []       # ZIP member names left untouched (incremental mode)
+        self.cancelled = False
+        self.error = None
+        self.elapsed = 0.0
+
+        # Work collected while staging
+        self.staged_members = []  # (ZipInfo, relative path) written to staging
+        self.new_dirs = []        # Relative folder paths from the ZIP
+        self.linked = 0           # Files hardlinked from the extract store
+
+    def start(self):
+        """
+        Run the job on a new daemon thread.
+        """
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def cancel(self):
+        """
+        Ask the job to stop as soon as possible.
+        """
+        self.cancel_event.set()
+
+    def is_running(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    def check_cancelled(self):
+        if self.cancel_event.is_set():
+            raise InstallCancelled()
+
+    def run(self):
+        start_time = time.perf_counter()
+        try:
+            self.staging.prepare()
+            keep = self.extract_phase()
+            self.check_cancelled()
+            self.commit_phase(keep)
+        except InstallCancelled:
+            self.cancelled = True
+            self.staging.finish()
+            self.extracted = {}
+        except Exception as e:
+            self.error = e
+            self.staging.finish()
+            self.extracted = {}
+        finally:
+            self.elapsed = time.perf_counter() - start_time
+            if self.on_done:
+                self.on_done(self)
+
+    def add_progress(self, byte_count):
+        # Called from every extraction thread
+        with self.progress_lock:
+            self.done_bytes += byte_count
+
+    def extract_phase(self):
+        """
+        Stage every changed member of the ZIP, either by streaming it from the
+        archive or by linking it from the extract store. Returns the normalized
+        paths the ZIP provides, which are not removed in incremental mode.
+        """
+        if not self.zip_path:
+            return set()  # Uninstall only
+        with zipfile.ZipFile(self.zip_path, 'r') as zip_ref:
+            members = zip_ref.infolist()
+            self.total_bytes = sum(info.file_size for info in members)
+
+            changed = []
+            for info in members:
+                self.check_cancelled()
+                target = member_target_path(self.install_dir, info)
+                rel_path = os.path.relpath(target, self.install_dir)
+                if info.is_dir():
+                    self.new_dirs.append(rel_path)
+                    continue
+                if self.incremental:
+                    self.message = f"Comparing {info.filename}"
+                    known = self.known_files.get(normalize_rel_path(info.filename))
+                    if member_unchanged(info, target, known, self.cancel_event):
+                        self.skipped.append(info.filename)
+                        self.done_bytes += info.file_size
+                        self.extracted[info.filename] = file_record(info, target)
+                        continue
+                changed.append((info, rel_path))
+
+            if changed:
+                self.stage_members(zip_ref, self.zip_path, changed)
+
+        if not self.incremental:
+            return set()
+        return {normalize_rel_path(info.filename) for info in members}
+
+    def stage_members(self, zip_ref, zip_path, changed):
+        """
+        Stage the (ZipInfo, relative path) pairs in changed from an open ZIP,
+        through the extract store if there is one.
+        """
+        if self.store is not None:
+            self.stage_from_store(zip_ref, zip_path, changed)
+        else:
+            self.message = f"Extracting {len(changed)} files"
+            extract_members(zip_ref, [(info, self.staging.staged_path(rel_path)) for info, rel_path in changed],
+                            self.workers, self.add_progress, self.cancel_event)
+            self.staged_members.extend(changed)
+
+    def stage_from_store(self, zip_ref, zip_path, changed):
+        """
+        Make sure the archive is in the extract store, then link (or copy) the
+        changed members from there into the staging folder.
+        """
+        digest = ExtractStore.archive_digest(zip_ref)
+        if self.store.has(digest) and not all(self.store.intact(digest, rel_path) for _, rel_path in changed):
+            # Changed in place through a hardlinked install; never link it again
+            print(f"Stored copy of {os.path.basename(zip_path)} was modified; decompressing it again",
+                  file=sys.stderr)
+            self.store.discard(digest)
+        if not self.store.has(digest):
+            self.message = f"Decompressing {os.path.basename(zip_path)}"
+            self.done_bytes = 0
+            self.store.populate(zip_ref, digest, self.add_progress, self.cancel_event, self.workers)
+            self.store.remember(zip_path, digest)
+
+        self.message = "Linking files"
+        for info, rel_path in changed:
+            self.check_cancelled()
+            if self.store.materialise(digest, rel_path, self.staging.staged_path(rel_path)):
+                self.linked += 1
+            self.staged_members.append((info, rel_path))
+        self.done_bytes = self.total_bytes
+
+    def commit_phase(self, keep):
+        """
+        Move staged files into place and remove the files being uninstalled.
+        """
+        self.message = "Moving files into place"
+        # Relative path as used on disk -> name as listed in the entry
+        remove_files = {}
+        for f in self.remove_files:
+            if normalize_rel_path(f) not in keep:
+                remove_files[os.path.relpath(os.path.join(self.install_dir, f), self.install_dir)] = f
+
+        removed = self.staging.commit(
+            [rel_path for _, rel_path in self.staged_members],
+            list(remove_files),
+            self.new_dirs
+        )
+        self.removed = [remove_files[rel_path] for rel_path in removed]
+        for info, rel_path in self.staged_members:
+            self.extracted[info.filename] = file_record(info, self.staging.target_path(rel_path))
+
+
+def installed_files(index, files):
+    """
+    Return the subset of files that exist in the install directory snapshot.
+    """
+    return [f for f in files if index.contains(f)]
+
+
+class FileOwnerIndex:
+    """
+    Reverse index from a relative install path to the entries that list it,
+    built once from entries[].files.
+
+    It answers "which options share these files" and "which options are
+    occupying these files on disk" by looking at the files of one entry only,
+    instead of checking every file of every other entry, and it also reports
+    partial overlaps between options. Entries are identified by their
+    position in the list.
+    """
+    def __init__(self, entries=()):
+        self.entries = []
+        self.owners = {}  # Normalized path -> [(entry position, file as listed)]
+        self.build(entries)
+
+    def build(self, entries):
+        self.entries = entries
+        self.owners = {}
+        for position, item in enumerate(entries):
+            for f in item.get("files", []):
+                self.owners.setdefault(normalize_rel_path(f), []).append((position, f))
+
+    def owners_of(self, path):
+        """
+        Return the positions of the entries that list path.
+        """
+        return [position for position, _ in self.owners.get(normalize_rel_path(path), [])]
+
+    def overlaps(self, position):
+        """
+        Return {other entry position: [files of the entry at position that
+        the other entry lists too]}.
+        """
+        shared = {}
+        for f in self.entries[position].get("files", []):
+            for other, _ in self.owners.get(normalize_rel_path(f), []):
+                if other != position:
+                    shared.setdefault(other, []).append(f)
+        return shared
+
+    def present_owners(self, index, ledger=None, keys=None):
+        """
+        Return {normalized path: [(entry position, file as listed)]} for the
+        listed paths (or only keys) present in the install directory snapshot,
+        limited to the entries that own each file: the entry the install
+        ledger recorded it for, else the listing entries that are fully
+        present, else every entry that lists it. A file another option put
+        there does not make an entry installed just because it lists it too.
+        """
+        recorded = ledger.file_owners(index.install_dir) if ledger is not None else {}
+
+        def is_recorded(position, key):
+            item = self.entries[position]
+            return ledger.entry_key(item) in recorded[key] and ledger.is_recorded(item, index.install_dir)
+        complete = {}
+
+        def is_complete(position):
+            if position not in complete:
+                complete[position] = index.has_all(self.entries[position].get("files", []))
+            return complete[position]
+
+        present = {}
+        for key in (self.owners.keys() if keys is None else keys) & index.paths:
+            listing = self.owners.get(key, [])
+            owners = [owner for owner in listing if is_recorded(owner[0], key)] if key in recorded else []
+            if not owners:
+                owners = [owner for owner in listing if is_complete(owner[0])]
+            present[key] = owners or listing
+        return present
+
+    def occupying(self, index, position, ledger=None):
+        """
+        Like overlaps(), but only for shared files that are currently present
+        in the install directory snapshot and owned by the other entry (see
+        present_owners), i.e. files that installing the entry would overwrite
+        or uninstalling it would remove.
+        """
+        keys = {normalize_rel_path(f) for f in self.entries[position].get("files", [])}
+        occupied = {}
+        for key, owners in self.present_owners(index, ledger, keys).items():
+            for other, f in owners:
+                if other != position:
+                    occupied.setdefault(other, []).append(f)
+        return occupied
+
+    def installed_entries(self, index, ledger=None):
+        """
+        Return {entry position: [its files present in the install directory
+        snapshot]} for every entry that owns at least one present file (see
+        present_owners).
+        """
+        present = {}
+        for key, owners in self.present_owners(index, ledger).items():
+            for position, f in owners:
+                present.setdefault(position, []).append(f)
+        return present
+
+
+def other_installed_entries(index, owners, skip_index, ledger=None):
+    """
+    Collect the installed files of every entry except the one at skip_index,
+    so an install job can remove them before extracting (single-install mode).
+    owners is a FileOwnerIndex of the entries and ledger the install ledger
+    (used to tell who owns shared files). Files the selected entry provides
+    itself are replaced rather than removed, so they are left out, and so is
+    an entry with no other files. Returns the affected entries and the list of
+    files to remove.
+    """
+    provided = {normalize_rel_path(f) for f in owners.entries[skip_index].get("files", [])}
+    items = []
+    files = []
+    seen = set()
+    present = owners.installed_entries(index, ledger)
+    for position in sorted(present):
+        if position == skip_index:
+            continue
+        lost = [f for f in present[position] if normalize_rel_path(f) not in provided]
+        if not lost:
+            continue
+        items.append(owners.entries[position])
+        for f in lost:
+            if normalize_rel_path(f) not in seen:
+                seen.add(normalize_rel_path(f))
+                files.append(f)
+    return items, files
+
+
+def create_install_job(settings, install_dir, remove_files, zip_path, ledger, store_dir, on_done=None):
+    """
+    Build an InstallJob configured from the selector settings
+    (IncrementalInstall, UseExtractStore, ExtractWorkers).
+    """
+    return InstallJob(
+        install_dir, remove_files, zip_path, on_done=on_done,
+        incremental=settings.get("IncrementalInstall", True),
+        known_files=ledger.known_files(install_dir),
+        store=ExtractStore(store_dir) if settings.get("UseExtractStore", True) else None,
+        workers=resolve_worker_count(settings.get("ExtractWorkers", 0))
+    )
+
+
+def record_install_result(ledger, index, job, selected, remove_items):
+    """
+    Apply a finished job to the ledger and save it: entries that were replaced
+    (or lost files before a cancel) are forgotten, then whatever was extracted
+    for selected is recorded. The index is invalidated since files changed.
+    """
+    removed = set(job.removed)
+    for item in remove_items:
+        if not (job.cancelled or job.error) or removed.intersection(item.get("files", [])):
+            ledger.forget(item)
+    if job.extracted:
+        ledger.record_install(selected, job.install_dir, job.extracted)
+    ledger.save()
+    index.invalidate()
+
+
+class InstallPlan:
+    """
+    The file operations that take the install directory from what is on disk
+    now to exactly the desired options being installed.
+
+    - creates / overwrites: members to extract because the file is missing or
+      its contents differ (normalized relative paths)
+    - untouched: files that already match the member (size and CRC32)
+    - deletes: files of other options that are on disk and that no desired
+      option provides (as listed by their entries)
+
+    When desired options list the same file, the later one wins. Built by
+    plan_install() and carried out by ApplyPlanJob.
+    """
+    def __init__(self, install_dir, entries, positions):
+        self.install_dir = install_dir
+        self.entries = entries
+        self.positions = list(positions)  # Desired entries, by position in entries
+        self.members = {}        # Normalized path -> (entry position, zip path, ZipInfo, relative path)
+        self.creates = []
+        self.overwrites = []
+        self.untouched = []
+        self.deletes = []
+        self.new_dirs = []       # Relative folder paths from the ZIPs
+        self.replaced = []       # Positions of undesired installed entries that lose files
+
+    def write_bytes(self):
+        return sum(self.members[key][2].file_size for key in self.creates + self.overwrites)
+
+    def summary(self):
+        """
+        Return the size of the plan as a dict, for dry-run output.
+        """
+        return {
+            "install": [self.entries[p].get("title", "") for p in self.positions],
+            "uninstall": [self.entries[p].get("title", "") for p in self.replaced],
+            "create": len(self.creates),
+            "overwrite": len(self.overwrites),
+            "delete": len(self.deletes),
+            "untouched": len(self.untouched),
+            "write_bytes": self.write_bytes(),
+        }
+
+    def operations(self):
+        """
+        Return every planned change as (operation, relative path) pairs.
+        """
+        return ([("create", self.members[key][3]) for key in self.creates] +
+                [("overwrite", self.members[key][3]) for key in self.overwrites] +
+                [("delete", f) for f in self.deletes])
+
+
+def plan_install(install_dir, index, owners, positions, known_files=None, cancel_event=None, ledger=None):
+    """
+    Compare the desired entries (positions in owners.entries) with the install
+    directory snapshot and return an InstallPlan. Files that exist with the
+    right size are checked against the member CRC32 (using the ledger records
+    in known_files when they are still valid), so only differing files are
+    written. ledger, if given, tells which entry owns shared files on disk.
+    """
+    known_files = known_files or {}
+    plan = InstallPlan(install_dir, owners.entries, positions)
+    for position in plan.positions:
+        zip_path = owners.entries[position]["zip_path"]
+        with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+            for info in zip_ref.infolist():
+                rel_path = os.path.relpath(member_target_path(install_dir, info), install_dir)
+                if info.is_dir():
+                    plan.new_dirs.append(rel_path)
+                else:
+                    plan.members[normalize_rel_path(rel_path)] = (position, zip_path, info, rel_path)
+
+    for key, (position, zip_path, info, rel_path) in plan.members.items():
+        if cancel_event is not None and cancel_event.is_set():
+            raise InstallCancelled()
+        if key not in index.paths:
+            plan.creates.append(key)
+        elif member_unchanged(info, os.path.join(install_dir, rel_path),
+                              known_files.get(normalize_rel_path(info.filename)), cancel_event):
+            plan.untouched.append(key)
+        else:
+            plan.overwrites.append(key)
+
+    keep = set(plan.members) | {normalize_rel_path(d) for d in plan.new_dirs}
+    desired = set(plan.positions)
+    deleted = set()
+    for position, files in sorted(owners.installed_entries(index, ledger).items()):
+        removed = [f for f in files if normalize_rel_path(f) not in keep]
+        if removed and position not in desired:
+            plan.replaced.append(position)  # Loses files; entries fully covered by desired ones stay
+        for f in removed:
+            key = normalize_rel_path(f)
+            if key not in deleted:
+                deleted.add(key)
+                plan.deletes.append(f)
+    return plan
+
+
+class ApplyPlanJob(InstallJob):
+    """
+    Carries out an InstallPlan as one staged transaction: only the planned
+    creates and overwrites are extracted (or linked from the extract store)
+    and only the planned deletes are removed.
+    """
+    def __init__(self, plan, on_done=None, store=None, workers=1):
+        super().__init__(plan.install_dir, plan.deletes, None, on_done, store=store, workers=workers)
+        self.plan = plan
+        self.entry_files = {}  # Entry position -> {member name: file_record()} for the ledger
+
+    def extract_phase(self):
+        by_zip = {}
+        for key in self.plan.creates + self.plan.overwrites:
+            position, zip_path, info, rel_path = self.plan.members[key]
+            by_zip.setdefault(zip_path, []).append((info, rel_path))
+        self.new_dirs.extend(self.plan.new_dirs)
+
+        for zip_path, changed in by_zip.items():
+            self.check_cancelled()
+            with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+                # Progress per archive, counting what is not written as done
+                self.total_bytes = sum(info.file_size for info in zip_ref.infolist())
+                self.done_bytes = self.total_bytes - sum(info.file_size for info, _ in changed)
+                self.stage_members(zip_ref, zip_path, changed)
+        return set()
+
+    def commit_phase(self, keep):
+        super().commit_phase(keep)
+        # Each desired entry owns the files it provides in the final state
+        for key, (position, zip_path, info, rel_path) in self.plan.members.items():
+            record = file_record(info, self.staging.target_path(rel_path))
+            self.entry_files.setdefault(position, {})[info.filename] = record
+
+
+def create_plan_job(settings, plan, store_dir, on_done=None):
+    """
+    Build an ApplyPlanJob configured from the selector settings.
+    """
+    return ApplyPlanJob(
+        plan, on_done=on_done,
+        store=ExtractStore(store_dir) if settings.get("UseExtractStore", True) else None,
+        workers=resolve_worker_count(settings.get("ExtractWorkers", 0))
+    )
+
+
+def record_plan_result(ledger, index, job):
+    """
+    Apply a finished ApplyPlanJob to the ledger and save it. A failed or
+    cancelled job left the install directory unchanged, so only the index is
+    invalidated then.
+    """
+    if not (job.cancelled or job.error):
+        plan = job.plan
+        for position in plan.replaced:
+            ledger.forget(plan.entries[position])
+        for position in plan.positions:
+            ledger.record_install(plan.entries[position], plan.install_dir, job.entry_files.get(position, {}))
+        ledger.save()
+    index.invalidate()
+
+
+def installed_entry_positions(entries, index, ledger):
+    """
+    Return the positions of the entries that are installed in the snapshot's
+    install directory: every file present, or recorded in the ledger (which
+    catches options that lost files).
+    """
+    return [position for position, item in enumerate(entries)
+            if item.get("files") and (index.has_all(item["files"]) or ledger.is_recorded(item, index.install_dir))]
+
+
+def verify_members(install_dir, candidates, workers=1, on_chunk=None, cancel_event=None):
+    """
+    Check installed files against the ZIP members that provide them.
+
+    candidates maps a normalized relative path to the (entry position, zip
+    path, ZipInfo, relative path) members that install it, last one winning.
+    A file is fine when its size and CRC32 match any of them. Files are read in
+    chunks on `workers` threads, largest first (zlib releases the GIL while
+    hashing, so threads keep the disk busy). Returns {path: (problem, member)}
+    where problem is None, "missing", "size", "crc" or "unreadable", and member
+    is the one that matched or the one to restore.
+    """
+    def check(key):
+        options = candidates[key]
+        path = os.path.join(install_dir, options[-1][3])
+        try:
+            size = os.stat(path).st_size
+        except OSError:
+            size = None
+        same_size = [member for member in options if member[2].file_size == size]
+        if size is None or not same_size:
+            if on_chunk:
+                on_chunk(options[-1][2].file_size)  # Nothing to read; count it as done
+            return key, ("missing" if size is None else "size", options[-1])
+        try:
+            crc = file_crc32(path, cancel_event, on_chunk)
+        except OSError:
+            return key, ("unreadable", options[-1])
+        for member in reversed(same_size):
+            if member[2].CRC == crc:
+                return key, (None, member)
+        return key, ("crc", options[-1])
+
+    ordered = sorted(candidates, key=lambda key: candidates[key][-1][2].file_size, reverse=True)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        return dict(pool.map(check, ordered))
+
+
+class VerifyJob(ApplyPlanJob):
+    """
+    Checks the installed files of some entries against the size and CRC32
+    recorded in their archives' central directories (see verify_members) and,
+    with repair, re-extracts only the members that are missing or damaged, as
+    one staged transaction.
+
+    Repairs always stream from the archive: a damaged file that was hardlinked
+    from the extract store shares its data with the stored copy, so the store
+    entries of affected archives are dropped instead of linked again.
+    """
+    def __init__(self, install_dir, entries, positions, repair=False, on_done=None, store=None, workers=1):
+        super().__init__(InstallPlan(install_dir, entries, positions), on_done, None, workers)
+        self.repair = repair
+        self.extract_store = store
+        self.problems = []  # (relative path, problem) for every file that failed the check
+        self.checked = False
+
+    def repair_job(self, on_done=None):
+        """
+        Return a job that repairs the problems this (finished) check found,
+        without reading every file again.
+        """
+        job = VerifyJob(self.install_dir, self.plan.entries, self.plan.positions, True,
+                        on_done, self.extract_store, self.workers)
+        job.plan = self.plan
+        job.problems = self.problems
+        job.checked = True
+        return job
+
+    def extract_phase(self):
+        if not self.checked:
+            self.check_files()
+        if not (self.repair and self.problems):
+            return set()
+        if self.extract_store is not None:
+            for zip_path in {self.plan.members[key][1] for key in self.plan.overwrites}:
+                with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+                    self.extract_store.discard(ExtractStore.archive_digest(zip_ref))
+        return super().extract_phase()
+
+    def check_files(self):
+        """
+        Read every installed file and sort the members into untouched,
+        creates (missing) and overwrites (damaged) of the plan.
+        """
+        plan = self.plan
+        candidates = {}
+        for position in plan.positions:
+            self.check_cancelled()
+            zip_path = plan.entries[position]["zip_path"]
+            with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+                for info in zip_ref.infolist():
+                    rel_path = os.path.relpath(member_target_path(self.install_dir, info), self.install_dir)
+                    if info.is_dir():
+                        plan.new_dirs.append(rel_path)
+                    else:
+                        candidates.setdefault(normalize_rel_path(rel_path), []).append((position, zip_path, info, rel_path))
+
+        self.total_bytes = sum(options[-1][2].file_size for options in candidates.values())
+        self.done_bytes = 0
+        self.message = f"Verifying {len(candidates)} files"
+        results = verify_members(self.install_dir, candidates, self.workers, self.add_progress, self.cancel_event)
+        for key in sorted(results):
+            problem, member = results[key]
+            plan.members[key] = member
+            if problem is None:
+                plan.untouched.append(key)
+                continue
+            self.problems.append((member[3], problem))
+            (plan.creates if problem == "missing" else plan.overwrites).append(key)
+        self.checked = True
+
+    def commit_phase(self, keep):
+        if self.repair and self.problems:
+            super().commit_phase(keep)
+        else:
+            self.staging.finish()  # Nothing to change
+
+
+def create_verify_job(settings, install_dir, entries, positions, repair, store_dir, on_done=None):
+    """
+    Build a VerifyJob configured from the selector settings (ExtractWorkers
+    sets how many files are read at once).
+    """
+    return VerifyJob(
+        install_dir, entries, positions, repair, on_done=on_done,
+        store=ExtractStore(store_dir) if settings.get("UseExtractStore", True) else None,
+        workers=resolve_worker_count(settings.get("ExtractWorkers", 0))
+    )
+
+
+def record_verify_result(ledger, index, job):
+    """
+    Record the files a VerifyJob repaired; a check without repairs changes
+    nothing.
+    """
+    if job.entry_files:
+        record_plan_result(ledger, index, job)
+
+
+def file_digest(path):
+    """
+    Return a SHA-1 of a file's contents, or None if it cannot be read.
+    """
+    try:
+        with open(path, "rb") as f:
+            return hashlib.sha1(f.read()).hexdigest()
+    except OSError:
+        return None
+
+
+class FileWatcher(abc.ABC):
+    """
+    Base class for watching a single file and calling on_change() (from the
+    watcher thread) when its contents change.
+
+    Backends only implement wait_for_event(timeout). Bursts of events, such as
+    the truncate and writes of one save, are debounced until the file has been
+    quiet for `debounce` seconds, and on_change() only fires if the content
+    hash actually differs from the last one seen.
+    """
+    def __init__(self, path, on_change, debounce=0.3):
+        self.path = path
+        self.on_change = on_change
+        self.debounce = debounce
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.last_digest = file_digest(path)
+
+    def start(self):
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+
+    @abc.abstractmethod
+    def wait_for_event(self, timeout):
+        """
+        Block until the file may have changed (True), the timeout in seconds
+        passed (False) or the watcher was stopped (False). None waits forever.
+        """
+
+    def close(self):
+        """
+        Release backend resources once the watcher thread ends.
+        """
+
+    def run(self):
+        try:
+            while not self.stop_event.is_set():
+                if not self.wait_for_event(None):
+                    continue
+                # Wait for the burst of writes to settle
+                while self.wait_for_event(self.debounce):
+                    pass
+                if self.stop_event.is_set():
+                    break
+                digest = file_digest(self.path)
+                if digest is not None and digest != self.last_digest:
+                    self.last_digest = digest
+                    self.on_change()
+        finally:
+            self.close()
+
+
+class PollingFileWatcher(FileWatcher):
+    """
+    Fallback backend that checks the file's mtime and size every `interval` seconds.
+    """
+    def __init__(self, path, on_change, debounce=0.3, interval=2.0):
+        super().__init__(path, on_change, debounce)
+        self.interval = interval
+        self.last_signature = self.signature()
+
+    def signature(self):
+        try:
+            st = os.stat(self.path)
+            return (st.st_mtime_ns, st.st_size)
+        except OSError:
+            return None
+
+    def wait_for_event(self, timeout):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait = self.interval if deadline is None else min(self.interval, max(0.0, deadline - time.monotonic()))
+            if self.stop_event.wait(wait):
+                return False
+            signature = self.signature()
+            if signature != self.last_signature:
+                self.last_signature = signature
+                return True
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+
+
+class InotifyFileWatcher(FileWatcher):
+    """
+    Linux backend using inotify on the file's folder, so the thread sleeps
+    until the kernel reports a write, rename or delete of the file.
+    """
+    IN_MODIFY = 0x00000002
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_NONBLOCK = 0o4000
+    IN_CLOEXEC = 0o2000000
+    EVENT_HEADER = struct.Struct("iIII")
+
+    def __init__(self, path, on_change, debounce=0.3):
+        super().__init__(path, on_change, debounce)
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self.fd = libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        folder = os.path.dirname(os.path.abspath(path))
+        mask = self.IN_MODIFY | self.IN_CLOSE_WRITE | self.IN_MOVED_TO | self.IN_CREATE | self.IN_DELETE
+        if libc.inotify_add_watch(self.fd, os.fsencode(folder), mask) < 0:
+            errno = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(errno, f"inotify_add_watch failed for {folder}")
+        self.name = os.fsencode(os.path.basename(path))
+        # Pipe used to wake the thread up when stopping
+        self.wake_read, self.wake_write = os.pipe()
+
+    def stop(self):
+        super().stop()
+        try:
+            os.write(self.wake_write, b"x")
+        except OSError:
+            pass
+
+    def wait_for_event(self, timeout):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self.stop_event.is_set():
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            ready, _, _ = select.select([self.fd, self.wake_read], [], [], remaining)
+            if self.wake_read in ready or self.stop_event.is_set():
+                return False
+            if not ready:
+                return False  # Timed out
+            if self.read_events():
+                return True
+        return False
+
+    def read_events(self):
+        """
+        Drain pending events and check if any concern the watched file.
+        """
+        try:
+            buffer = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return False
+        matched = False
+        offset = 0
+        while offset + self.EVENT_HEADER.size <= len(buffer):
+            _, _, _, name_length = self.EVENT_HEADER.unpack_from(buffer, offset)
+            offset += self.EVENT_HEADER.size
+            name = buffer[offset:offset + name_length].rstrip(b"\0")
+            offset += name_length
+            if name == self.name:
+                matched = True
+        return matched
+
+    def close(self):
+        for fd in (self.fd, self.wake_read, self.wake_write):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+
+class WindowsFileWatcher(FileWatcher):
+    """
+    Windows backend using FindFirstChangeNotification on the file's folder, so
+    the thread sleeps until a file there is written or renamed.
+    """
+    FILE_NOTIFY_CHANGE_FILE_NAME = 0x00000001
+    FILE_NOTIFY_CHANGE_SIZE = 0x00000008
+    FILE_NOTIFY_CHANGE_LAST_WRITE = 0x00000010
+    WAIT_OBJECT_0 = 0
+    WAIT_TIMEOUT = 0x00000102
+    INFINITE = 0xFFFFFFFF
+    INVALID_HANDLE_VALUE = ctypes.c_void_p(-1).value
+
+    def __init__(self, path, on_change, debounce=0.3):
+        super().__init__(path, on_change, debounce)
+        kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+        kernel32.FindFirstChangeNotificationW.restype = ctypes.c_void_p
+        kernel32.FindFirstChangeNotificationW.argtypes = [ctypes.c_wchar_p, ctypes.c_int, ctypes.c_uint32]
+        kernel32.FindNextChangeNotification.argtypes = [ctypes.c_void_p]
+        kernel32.FindCloseChangeNotification.argtypes = [ctypes.c_void_p]
+        kernel32.CreateEventW.restype = ctypes.c_void_p
+        kernel32.CreateEventW.argtypes = [ctypes.c_void_p, ctypes.c_int, ctypes.c_int, ctypes.c_wchar_p]
+        kernel32.SetEvent.argtypes = [ctypes.c_void_p]
+        kernel32.CloseHandle.argtypes = [ctypes.c_void_p]
+        kernel32.WaitForMultipleObjects.restype = ctypes.c_uint32
+        kernel32.WaitForMultipleObjects.argtypes = [ctypes.c_uint32, ctypes.POINTER(ctypes.c_void_p), ctypes.c_int, ctypes.c_uint32]
+        self.kernel32 = kernel32
+
+        folder = os.path.dirname(os.path.abspath(path))
+        flags = self.FILE_NOTIFY_CHANGE_FILE_NAME | self.FILE_NOTIFY_CHANGE_SIZE | self.FILE_NOTIFY_CHANGE_LAST_WRITE
+        self.change_handle = kernel32.FindFirstChangeNotificationW(folder, False, flags)
+        if not self.change_handle or self.change_handle == self.INVALID_HANDLE_VALUE:
+            raise ctypes.WinError(ctypes.get_last_error())
+        # Event used to wake the thread up when stopping
+        self.wake_handle = kernel32.CreateEventW(None, True, False, None)
+        self.handles = (ctypes.c_void_p * 2)(self.change_handle, self.wake_handle)
+
+    def stop(self):
+        super().stop()
+        self.kernel32.SetEvent(self.wake_handle)
+
+    def wait_for_event(self, timeout):
+        if self.stop_event.is_set():
+            return False
+        millis = self.INFINITE if timeout is None else int(timeout * 1000)
+        result = self.kernel32.WaitForMultipleObjects(2, self.handles, False, millis)
+        if result == self.WAIT_OBJECT_0:
+            # Re-arm the notification for the next change
+            self.kernel32.FindNextChangeNotification(self.change_handle)
+            return True
+        return False  # Woken up to stop, timed out or failed
+
+    def close(self):
+        self.kernel32.FindCloseChangeNotification(self.change_handle)
+        self.kernel32.CloseHandle(self.wake_handle)
+
+
+def create_file_watcher(path, on_change, debounce=0.3):
+    """
+    Create the best available watcher for this platform, falling back to
+    polling if native notifications are not available.
+    """
+    backends = []
+    if sys.platform == "win32":
+        backends.append(WindowsFileWatcher)
+    elif sys.platform.startswith("linux"):
+        backends.append(InotifyFileWatcher)
+
+    for backend in backends:
+        try:
+            return backend(path, on_change, debounce)
+        except (OSError, AttributeError, TypeError) as e:
+            print(f"{backend.__name__} unavailable, falling back to polling: {e}", file=sys.stderr)
+    return PollingFileWatcher(path, on_change, debounce)
+
+
+class EntryStatusEngine:
+    """
+    Works out the status of mod option entries (files listed, installed,
+    missing metadata) once and memoizes it.
+
+    - Metadata warnings are kept until the entry itself is edited.
+    - Whether a preview exists is cached per path and dropped only when the
+      folder holding it changes, which costs one stat per preview folder per
+      pass instead of one per entry.
+    - Installed flags are kept until install_state() returns a different
+      token, i.e. the install directory or what is known about it changed.
+
+    is_installed(item) and install_state() come from the caller, so the engine
+    works the same for the selector and for scripts.
+    """
+    WARNING_FIELDS = ("chunk_id", "replaces", "description")
+
+    def __init__(self, is_installed, install_state):
+        self.is_installed = is_installed
+        self.install_state = install_state
+        self.install_token = None
+        self.entries = {}         # Entry key -> (entry snapshot, metadata warnings)
+        self.installed = {}       # Entry key -> installed flag for install_token
+        self.preview_exists = {}  # Preview path -> exists
+        self.preview_dirs = {}    # Preview folder -> mtime when checked (None if missing)
+
+    @staticmethod
+    def folder_mtime(folder):
+        try:
+            return os.stat(folder or ".").st_mtime_ns
+        except OSError:
+            return None
+
+    def check_sources(self):
+        """
+        Drop memoized results whose inputs changed. statuses() calls this;
+        call it before a series of status() calls.
+        """
+        token = self.install_state()
+        if token != self.install_token:
+            self.install_token = token
+            self.installed = {}
+        for folder, mtime in list(self.preview_dirs.items()):
+            if self.folder_mtime(folder) != mtime:
+                del self.preview_dirs[folder]
+                self.preview_exists = {path: exists for path, exists in self.preview_exists.items()
+                                       if os.path.dirname(path) != folder}
+
+    def has_preview(self, path):
+        exists = self.preview_exists.get(path)
+        if exists is None:
+            folder = os.path.dirname(path)
+            if folder not in self.preview_dirs:
+                # Before checking the file, so a change in between is noticed next pass
+                self.preview_dirs[folder] = self.folder_mtime(folder)
+            exists = bool(path) and os.path.exists(path)
+            self.preview_exists[path] = exists
+        return exists
+
+    def status(self, key, item):
+        """
+        Return the status of one entry as a dict with "has_files",
+        "installed" and "warnings" (names of missing fields, "preview" for a
+        missing preview file).
+        """
+        memo = self.entries.get(key)
+        if memo is None or memo[0] != item:
+            memo = (dict(item), [field for field in self.WARNING_FIELDS if not item.get(field)])
+            self.entries[key] = memo
+            self.installed.pop(key, None)
+
+        has_files = bool(item.get("files"))
+        installed = self.installed.get(key)
+        if installed is None:
+            installed = has_files and self.is_installed(item)
+            self.installed[key] = installed
+
+        warnings = memo[1]
+        if not self.has_preview(item.get("preview", "")):
+            warnings = ["preview"] + warnings
+        return {"has_files": has_files, "installed": installed, "warnings": warnings}
+
+    def statuses(self, entries):
+        """
+        Return {key: status} for an iterable of (key, entry) pairs.
+        """
+        self.check_sources()
+        return {key: self.status(key, item) for key, item in entries}
+
+    def retain(self, keys):
+        """
+        Forget memoized results for entries not in keys (e.g. after a reload).
+        """
+        keys = set(keys)
+        for key in self.entries.keys() - keys:
+            del self.entries[key]
+            self.installed.pop(key, None)
+
+
+class TextWidthTracker:
+    """
+    Keeps the width of the widest text among a set of keyed rows up to date
+    as rows are added, removed or renamed.
+
+    Widths are cached by (font, text), so each distinct text is measured only
+    once per font, and the maximum lives in a max-heap with lazy deletion
+    (compacted once stale entries outnumber live ones), so a change costs
+    O(log n) amortized instead of a rescan of every row. measure is any
+    callable returning the width of a string (e.g. tkinter's Font.measure).
+    """
+    def __init__(self):
+        self.font_name = None
+        self.measure = None
+        self.widths = {}  # (font name, text) -> width
+        self.texts = {}   # row key -> text
+        self.counts = {}  # width -> number of rows that wide
+        self.heap = []    # Negated widths; ones no longer in counts are skipped
+
+    def set_font(self, font_name, measure):
+        """
+        Use a font for measuring; every row is re-measured if it changed.
+        """
+        if font_name == self.font_name:
+            return
+        self.font_name = font_name
+        self.measure = measure
+        texts = self.texts
+        self.widths = {}  # Widths in other fonts are not needed any more
+        self.texts = {}
+        self.counts = {}
+        self.heap = []
+        self.sync(texts)
+
+    def width(self, text):
+        key = (self.font_name, text)
+        width = self.widths.get(key)
+        if width is None:
+            width = self.measure(text)
+            self.widths[key] = width
+        return width
+
+    def add(self, key, text):
+        """
+        Add a row or change its text.
+        """
+        self.discard(key)
+        self.texts[key] = text
+        width = self.width(text)
+        count = self.counts.get(width, 0)
+        self.counts[width] = count + 1
+        if count == 0:
+            heapq.heappush(self.heap, -width)
+            if len(self.heap) > 2 * len(self.counts) + 16:
+                self.compact()
+
+    def compact(self):
+        """
+        Drop stale heap entries and cached widths of texts no row uses any
+        more, so both stay proportional to the rows over a long session.
+        """
+        self.heap = [-width for width in self.counts]
+        heapq.heapify(self.heap)
+        used = {(self.font_name, text) for text in self.texts.values()}
+        self.widths = {key: width for key, width in self.widths.items() if key in used}
+
+    def discard(self, key):
+        """
+        Remove a row if present.
+        """
+        text = self.texts.pop(key, None)
+        if text is None:
+            return
+        width = self.width(text)
+        self.counts[width] -= 1
+        if not self.counts[width]:
+            del self.counts[width]  # Its heap entry is dropped lazily
+
+    def sync(self, texts):
+        """
+        Make the rows match texts (row key -> text), touching only the rows
+        that were added, removed or renamed.
+        """
+        for key in self.texts.keys() - texts.keys():
+            self.discard(key)
+        for key, text in texts.items() - self.texts.items():
+            self.add(key, text)
+
+    def max_width(self):
+        """
+        Return the width of the widest row, or 0 if there are none.
+        """
+        while self.heap and -self.heap[0] not in self.counts:
+            heapq.heappop(self.heap)
+        return -self.heap[0] if self.heap else 0
+
+
+class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+    """
+    Windows PROCESS_MEMORY_COUNTERS, filled in by GetProcessMemoryInfo.
+    """
+    _fields_ = [
+        ("cb", ctypes.c_uint32),
+        ("PageFaultCount", ctypes.c_uint32),
+        ("PeakWorkingSetSize", ctypes.c_size_t),
+        ("WorkingSetSize", ctypes.c_size_t),
+        ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+        ("QuotaPagedPoolUsage", ctypes.c_size_t),
+        ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+        ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+        ("PagefileUsage", ctypes.c_size_t),
+        ("PeakPagefileUsage", ctypes.c_size_t),
+    ]
+
+
+def process_memory():
+    """
+    Return (current, peak) resident set size of this process in bytes. Either
+    value is None if the platform does not report it.
+    """
+    if sys.platform == "win32":
+        counters = PROCESS_MEMORY_COUNTERS()
+        counters.cb = ctypes.sizeof(counters)
+        kernel32 = ctypes.WinDLL("kernel32")
+        psapi = ctypes.WinDLL("psapi")
+        kernel32.GetCurrentProcess.restype = ctypes.c_void_p
+        psapi.GetProcessMemoryInfo.argtypes = [ctypes.c_void_p, ctypes.POINTER(PROCESS_MEMORY_COUNTERS), ctypes.c_uint32]
+        if psapi.GetProcessMemoryInfo(kernel32.GetCurrentProcess(), ctypes.byref(counters), counters.cb):
+            return counters.WorkingSetSize, counters.PeakWorkingSetSize
+        return None, None
+
+    import resource  # Unix only
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    peak *= 1 if sys.platform == "darwin" else 1024  # Bytes on macOS, KiB elsewhere
+    current = None
+    try:
+        with open("/proc/self/statm", "r") as f:
+            current = int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+    return current, peak
@@ -0,0 +1,539 @@
+# Preview image loading and caching shared by the Mod Option tools
+import concurrent.futures  # For decoding previews on worker threads
+import hashlib         # For naming cached thumbnails
+import json            # For thumbnail metadata
+import os              # For file and path operations
+import tempfile        # For writing thumbnails under unique temporary names
+import threading       # For guarding the cache across threads
+from collections import OrderedDict  # For least-recently-used ordering
+from PIL import Image, ImageTk  # For image handling and displaying in Tkinter
+
+# Longest side of each cached thumbnail level, smallest first
+THUMBNAIL_LEVELS = (256, 512, 1024, 2048)
+
+
+def image_size_bytes(width, height, bands=4):
+    """
+    Approximate memory used by a decoded image or PhotoImage.
+    """
+    return width * height * bands
+
+
+def fit_size(image_width, image_height, box_width, box_height):
+    """
+    Return the largest size with the image's aspect ratio that fits in the box.
+    """
+    img_ratio = image_width / image_height
+    box_ratio = box_width / box_height
+    if img_ratio > box_ratio:
+        return box_width, max(1, int(box_width / img_ratio))
+    return max(1, int(box_height * img_ratio)), box_height
+
+
+def open_image(path, box_width=None, box_height=None, reducing_gap=2.0):
+    """
+    Decode path at the lowest resolution that still scales well to fit the box.
+
+    JPEGs are decoded with DCT scaling through draft(), so a large screenshot
+    is never decoded at full size. Other formats are decoded fully and then
+    shrunk by an integer factor with reduce(). Either way at least
+    reducing_gap times the fitted size is kept, so the final resize still has
+    enough pixels for a sharp result. Without a box the full image is decoded.
+
+    Returns (image, original size); the image is RGB or RGBA.
+    """
+    image = Image.open(path)
+    original_size = image.size
+    if box_width and box_height:
+        width, height = fit_size(*original_size, box_width, box_height)
+        wanted = (int(width * reducing_gap), int(height * reducing_gap))
+        image.draft(None, wanted)  # No effect on formats without reduced decoding
+        image.load()  # Decodes and closes the file
+        factor = min(image.width // wanted[0], image.height // wanted[1])
+        if factor > 1:
+            # reduce() does not support palette, bilevel or 16-bit modes
+            image = image.reduce(factor) if image.mode in ("RGB", "RGBA") else \
+                image.convert("RGBA").reduce(factor)
+    else:
+        image.load()
+    if image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA")
+    return image, original_size
+
+
+class ThumbnailStore:
+    """
+    On-disk cache of downscaled previews.
+
+    For each preview file version (path and mtime) it keeps a copy at every
+    level in THUMBNAIL_LEVELS smaller than the original, plus a small JSON file
+    with the original's size. Opening a preview then only has to read and
+    decode the smallest level that covers the canvas instead of the full-size
+    image, even on the first view after a restart. Older versions of the same
+    file are removed when a new version is saved.
+
+    Images without transparency are saved as JPEG, others as PNG.
+    """
+    def __init__(self, root, levels=THUMBNAIL_LEVELS):
+        self.root = root
+        self.levels = tuple(sorted(levels))
+
+    @staticmethod
+    def path_prefix(path):
+        return hashlib.sha1(os.path.normcase(path).encode("utf-8")).hexdigest()[:16]
+
+    def base_name(self, source):
+        """
+        File name stem for a (path, mtime) source key.
+        """
+        path, mtime = source
+        version = hashlib.sha1(f"{os.path.normcase(path)}|{mtime}".encode("utf-8")).hexdigest()[:16]
+        return f"{self.path_prefix(path)}_{version}"
+
+    def level_for(self, box_width, box_height):
+        """
+        Return the smallest level that covers the box, or None if the box is
+        larger than every level.
+        """
+        for level in self.levels:
+            if level >= max(box_width, box_height):
+                return level
+        return None
+
+    def read_info(self, source):
+        """
+        Return the saved metadata for source, or None if it is not cached.
+        """
+        try:
+            with open(os.path.join(self.root, self.base_name(source) + ".json"), "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def load(self, source, level):
+        """
+        Return (thumbnail, original size) for source at level, or None if that
+        level is not cached.
+        """
+        info = self.read_info(source)
+        if info is None or level not in info.get("levels", []):
+            return None
+        try:
+            image = Image.open(os.path.join(self.root, f"{self.base_name(source)}_{level}.{info['format']}"))
+            image.load()  # Decodes and closes the file
+        except (OSError, ValueError) as e:
+            print(f"Error reading cached thumbnail: {e}")
+            return None
+        return image, tuple(info["size"])
+
+    def save(self, source, image, original_size=None):
+        """
+        Write every missing level that is smaller than the original and that
+        image (the original, possibly decoded at reduced size) covers. Safe to
+        run on a worker thread; files are written under unique temporary names
+        and moved into place, metadata last.
+        """
+        original_size = original_size or image.size
+        info = self.read_info(source)
+        is_new = info is None
+        if is_new:
+            info = {"size": list(original_size), "format": "png" if image.mode == "RGBA" else "jpg", "levels": []}
+        wanted = [level for level in self.levels
+                  if level < max(original_size) and level <= max(image.size) and level not in info["levels"]]
+        if not wanted:
+            return
+        try:
+            os.makedirs(self.root, exist_ok=True)
+            base = self.base_name(source)
+            thumbnail = image
+            # Largest first, each level scaled from the one above it
+            for level in reversed(wanted):
+                thumbnail = thumbnail.resize(fit_size(*original_size, level, level), Image.Resampling.LANCZOS)
+                path = os.path.join(self.root, f"{base}_{level}.{info['format']}")
+                if info["format"] == "png":
+                    self.replace_file(path, lambda f: thumbnail.save(f, format="PNG", compress_level=1))
+                else:
+                    self.replace_file(path, lambda f: thumbnail.convert("RGB").save(f, format="JPEG", quality=90))
+                info["levels"].append(level)
+            # Metadata last, so every level it lists is already in place
+            self.replace_file(os.path.join(self.root, base + ".json"),
+                              lambda f: f.write(json.dumps(info).encode("utf-8")))
+            if is_new:
+                self.remove_stale(source)
+        except OSError as e:
+            print(f"Error saving preview thumbnails: {e}")
+
+    def replace_file(self, path, write):
+        """
+        Call write(file) on a new temporary file next to path, then move it
+        into place. Every call gets its own temporary name, so two threads
+        saving the same thumbnail never write to the same file.
+        """
+        fd, temp_path = tempfile.mkstemp(prefix=os.path.basename(path) + ".", suffix=".tmp", dir=self.root)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                write(f)
+            os.replace(temp_path, path)
+        except BaseException:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            raise
+
+    def remove_stale(self, source):
+        """
+        Delete cached thumbnails of other versions of source's file.
+        """
+        prefix = self.path_prefix(source[0]) + "_"
+        current = self.base_name(source)
+        with os.scandir(self.root) as entries:
+            for entry in entries:
+                if entry.name.startswith(prefix) and not entry.name.startswith(current):
+                    try:
+                        os.remove(entry.path)
+                    except OSError:
+                        pass
+
+
+class PreviewCache:
+    """
+    Memory-bounded LRU cache of preview images.
+
+    Holds both decoded originals (keyed by path and mtime) and ready-made
+    PhotoImages (keyed by path, mtime and target size), so moving back to a
+    previously shown entry or redrawing at a size seen before costs no disk
+    access, decoding or resizing. When the total size goes over budget_bytes,
+    the least recently used images are dropped.
+
+    With a ThumbnailStore, scaling starts from the smallest cached thumbnail
+    level that covers the box, and the levels are written the first time an
+    original is decoded.
+
+    With max_size (normally the screen size, the largest the canvas can get),
+    a decoded image is capped to fit inside it before being cached. The
+    full-resolution decode is dropped as soon as the capped working copy and
+    any thumbnails are made, so an 8K preview costs no more than a
+    screen-sized one while it is selected.
+
+    Decoding and scaling (get_original, make_scaled) are safe to call from
+    worker threads. PhotoImages belong to the Tk interpreter, so they are only
+    created on the Tk thread (the one that built the cache), and PhotoImages
+    evicted by a worker are only released there.
+    """
+    def __init__(self, budget_bytes=256 * 1024 * 1024, thumbnails=None, max_size=None):
+        self.budget_bytes = budget_bytes
+        self.thumbnails = thumbnails  # Optional ThumbnailStore
+        self.max_size = max_size  # Optional (width, height) cap for decoded images
+        self.entries = OrderedDict()  # key -> (value, size in bytes)
+        self.total_bytes = 0
+        self.dimensions = {}  # (path, mtime) -> full image size, kept after eviction
+        self.lock = threading.Lock()
+        self.ui_thread = threading.get_ident()
+        self.released_photos = []  # PhotoImages evicted off the Tk thread
+
+    def get(self, key):
+        """
+        Return a cached value (marking it as recently used) or None.
+        """
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            self.entries.move_to_end(key)
+            return entry[0]
+
+    def put(self, key, value, size):
+        """
+        Add a value and evict least recently used values until within budget.
+        """
+        with self.lock:
+            old = self.entries.pop(key, None)
+            if old is not None:
+                self.total_bytes -= old[1]
+            self.entries[key] = (value, size)
+            self.total_bytes += size
+            while self.total_bytes > self.budget_bytes and len(self.entries) > 1:
+                evicted_key, (evicted, evicted_size) = self.entries.popitem(last=False)
+                self.total_bytes -= evicted_size
+                if evicted_key[0] == "photo" and threading.get_ident() != self.ui_thread:
+                    # Deleting a PhotoImage calls into Tk; leave that to the Tk thread
+                    self.released_photos.append(evicted)
+            if threading.get_ident() == self.ui_thread:
+                self.released_photos = []
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.total_bytes = 0
+            self.dimensions.clear()
+
+    def stats(self):
+        """
+        Return a summary of the cache contents for diagnostics.
+        """
+        with self.lock:
+            counts = {}
+            for key in self.entries:
+                counts[key[0]] = counts.get(key[0], 0) + 1
+            return {
+                "total_bytes": self.total_bytes,
+                "budget_bytes": self.budget_bytes,
+                "counts": counts,
+                "max_size": self.max_size,
+            }
+
+    @staticmethod
+    def source_key(path):
+        """
+        Identify a preview file version; raises OSError if it does not exist.
+        """
+        return (os.path.abspath(path), os.stat(path).st_mtime_ns)
+
+    def get_original(self, path, source=None, box_width=None, box_height=None):
+        """
+        Return path decoded at a resolution good enough to fit the box (see
+        open_image), or at full size without a box, capped to max_size. A
+        cached decode is reused when it is large enough.
+        """
+        source = source or self.source_key(path)
+        if self.max_size:
+            # The canvas never gets bigger than max_size
+            box_width = min(box_width or self.max_size[0], self.max_size[0])
+            box_height = min(box_height or self.max_size[1], self.max_size[1])
+        key = ("original",) + source
+        image = self.get(key)
+        if image is not None:
+            full_size = self.dimensions.get(source, image.size)
+            if image.size == tuple(full_size):
+                return image
+            if box_width and box_height:
+                width, height = fit_size(*full_size, box_width, box_height)
+                if image.width >= width and image.height >= height:
+                    return image
+        image, full_size = open_image(path, box_width, box_height)
+        self.dimensions[source] = full_size
+        if self.thumbnails is not None:
+            self.thumbnails.save(source, image, full_size)
+        if self.max_size:
+            width, height = fit_size(*full_size, *self.max_size)
+            if image.width > width or image.height > height:
+                # Keep only the capped working copy; the larger decode is released
+                image = image.resize((width, height), Image.Resampling.LANCZOS)
+        self.put(key, image, image_size_bytes(image.width, image.height, len(image.getbands())))
+        return image
+
+    def get_thumbnail(self, source, box_width, box_height):
+        """
+        Return the smallest cached thumbnail of source covering the box, from
+        memory or disk, or None if there is none.
+        """
+        if self.thumbnails is None:
+            return None
+        level = self.thumbnails.level_for(box_width, box_height)
+        if level is None:
+            return None
+        key = ("thumbnail",) + source + (level,)
+        image = self.get(key)
+        if image is None:
+            loaded = self.thumbnails.load(source, level)
+            if loaded is None:
+                return None
+            image, self.dimensions[source] = loaded
+            self.put(key, image, image_size_bytes(image.width, image.height, len(image.getbands())))
+        return image
+
+    def get_scaling_source(self, path, source, box_width, box_height):
+        """
+        Return (image, original size) for the cheapest image that can be
+        scaled to fit the box: a decoded original, a thumbnail, or a freshly
+        decoded original.
+        """
+        original = self.get(("original",) + source)
+        if original is None:
+            thumbnail = self.get_thumbnail(source, box_width, box_height)
+            if thumbnail is not None:
+                return thumbnail, self.dimensions[source]
+            original = self.get_original(path, source, box_width, box_height)
+        return original, self.dimensions[source]
+
+    def lookup_photo(self, path, box_width, box_height):
+        """
+        Return a cached PhotoImage of path scaled to fit the box, or None
+        without decoding anything.
+        """
+        try:
+            source = self.source_key(path)
+        except OSError:
+            return None
+        if source not in self.dimensions:
+            return None
+        width, height = fit_size(*self.dimensions[source], box_width, box_height)
+        return self.get(("photo",) + source + (width, height))
+
+    def make_scaled(self, path, box_width, box_height):
+        """
+        Decode (or reuse) a thumbnail or the original and scale it to fit the
+        box. Safe to run on a worker thread. Returns (source, scaled PIL image).
+        """
+        source = self.source_key(path)
+        image, full_size = self.get_scaling_source(path, source, box_width, box_height)
+        # Size from the original so cached PhotoImages are found by lookup_photo
+        width, height = fit_size(*full_size, box_width, box_height)
+        # Resize image using high-quality resampling filter
+        return source, image.resize((width, height), Image.Resampling.LANCZOS)
+
+    def put_photo(self, source, scaled):
+        """
+        Turn a scaled image into a cached PhotoImage. Tk thread only.
+        """
+        photo = ImageTk.PhotoImage(scaled)
+        self.put(("photo",) + source + scaled.size, photo, image_size_bytes(*scaled.size))
+        return photo
+
+    def get_mipmap(self, source, original, box_width, box_height):
+        """
+        Return the smallest power-of-two reduction of original that still
+        covers the box (the original itself if none does), cached alongside it.
+        """
+        factor = 1
+        while original.width // (factor * 2) >= box_width and original.height // (factor * 2) >= box_height:
+            factor *= 2
+        if factor == 1:
+            return original
+        key = ("mipmap",) + source + (factor,)
+        mipmap = self.get(key)
+        if mipmap is None:
+            mipmap = original.reduce(factor)
+            self.put(key, mipmap, image_size_bytes(mipmap.width, mipmap.height, len(mipmap.getbands())))
+        return mipmap
+
+    def fast_photo(self, path, box_width, box_height):
+        """
+        Quickly scale an already decoded preview to fit the box, for use while
+        the window is being resized: a mipmap is scaled with the cheap BILINEAR
+        filter. Falls back to a thumbnail already in memory. Returns None if
+        neither is available. Tk thread only; the result is not cached.
+        """
+        try:
+            source = self.source_key(path)
+        except OSError:
+            return None
+        original = self.get(("original",) + source)
+        if original is not None:
+            image = self.get_mipmap(source, original, box_width, box_height)
+        elif self.thumbnails is not None and source in self.dimensions:
+            level = self.thumbnails.level_for(box_width, box_height)
+            image = self.get(("thumbnail",) + source + (level,)) if level else None
+            if image is None:
+                return None
+        else:
+            return None
+        size = fit_size(*self.dimensions[source], box_width, box_height)
+        return ImageTk.PhotoImage(image.resize(size, Image.Resampling.BILINEAR))
+
+    def get_photo(self, path, box_width, box_height):
+        """
+        Return a PhotoImage of path scaled to fit inside the box. Tk thread only.
+        """
+        photo = self.lookup_photo(path, box_width, box_height)
+        if photo is None:
+            photo = self.put_photo(*self.make_scaled(path, box_width, box_height))
+        return photo
+
+
+class PreviewLoader:
+    """
+    Loads previews on a small worker pool so decoding never blocks the Tk loop.
+
+    Every request() gets a new generation number. Queued work for an older
+    generation is skipped before decoding, and results that arrive for an
+    older generation are dropped, so fast navigation only decodes what is
+    still wanted. Only the PhotoImage creation happens on the Tk thread,
+    scheduled through master.after.
+
+    prefetch() warms the cache for previews the user is likely to look at
+    next; it has its own generation so it never drops a visible request.
+    """
+    def __init__(self, master, cache, workers=2):
+        self.master = master
+        self.cache = cache
+        self.pool = concurrent.futures.ThreadPoolExecutor(max_workers=max(1, workers))
+        self.generation = 0
+        self.prefetch_generation = 0
+
+    def request(self, path, box_width, box_height, on_ready, on_error=None):
+        """
+        Show path scaled to fit the box: on_ready(photo) is called on the Tk
+        thread, immediately if the PhotoImage is cached. on_error(exception)
+        is called if loading fails. Supersedes any earlier request.
+        """
+        self.generation += 1
+        generation = self.generation
+
+        photo = self.cache.lookup_photo(path, box_width, box_height)
+        if photo is not None:
+            on_ready(photo)
+            return
+
+        def work():
+            if generation != self.generation:
+                return None  # Superseded while queued
+            return self.cache.make_scaled(path, box_width, box_height)
+
+        def deliver(future):
+            if generation != self.generation:
+                return  # User already moved on
+            try:
+                result = future.result()
+            except Exception as e:
+                if on_error:
+                    on_error(e)
+                return
+            if result is not None:
+                on_ready(self.cache.put_photo(*result))
+
+        future = self.pool.submit(work)
+        future.add_done_callback(lambda f: self.master.after(0, lambda: deliver(f)))
+
+    def prefetch(self, paths, box_width, box_height):
+        """
+        Decode and scale paths to fit the box in the background and cache the
+        resulting PhotoImages, so showing them later needs no disk access or
+        decoding. Supersedes any earlier prefetch.
+        """
+        self.prefetch_generation += 1
+        generation = self.prefetch_generation
+
+        def work(path):
+            if generation != self.prefetch_generation:
+                return None  # Superseded while queued
+            if self.cache.lookup_photo(path, box_width, box_height) is not None:
+                return None  # Already cached
+            return self.cache.make_scaled(path, box_width, box_height)
+
+        def deliver(future):
+            if generation != self.prefetch_generation:
+                return
+            try:
+                result = future.result()
+            except Exception:
+                return  # Missing or broken previews are reported when shown
+            if result is not None:
+                self.cache.put_photo(*result)
+
+        for path in paths:
+            if path and self.cache.lookup_photo(path, box_width, box_height) is None:
+                future = self.pool.submit(work, path)
+                future.add_done_callback(lambda f: self.master.after(0, lambda: deliver(f)))
+
+    def cancel(self):
+        """
+        Drop every pending request and prefetch.
+        """
+        self.generation += 1
+        self.prefetch_generation += 1
+
+    def shutdown(self):
+        self.cancel()
+        self.pool.shutdown(wait=False)
@@ -1,10 +1,10 @@
 import json            # For reading/writing JSON files (settings, zip data, theme)
 import subprocess  # For launching external applications
 import os              # For file and path operations
-import zipfile         # To handle zip files (extracting them)
 import sys             # To exit the program on errors
 import tempfile        # To get temp directory for lock file
 import msvcrt          # For Windows file locking (prevent multiple instances)
+import threading       # For background checks that must not block the UI
 import webbrowser
 from tkinter import (
     Tk, Canvas, filedialog, Scrollbar, Frame, RIGHT, BOTH, Y,
@@ -12,6 +12,13 @@ from tkinter import (
 )
 # GUI toolkit (Tkinter) and submodules for widgets, dialogs, and styling
 from PIL import Image, ImageTk  # For image handling and displaying in Tkinter
+from mod_option_preview import PreviewCache, PreviewLoader, ThumbnailStore  # Background preview loading and caching
+from mod_option_core import (  # Install state, jobs, file watching and entry status
+    InstallDirIndex, InstallLedger, StagedInstall, create_file_watcher, process_memory, TextWidthTracker,
+    EntryStatusEngine, FileOwnerIndex, ApplyPlanJob, installed_files, other_installed_entries,
+    create_install_job, record_install_result, plan_install, create_plan_job, record_plan_result,
+    VerifyJob, installed_entry_positions, create_verify_job, record_verify_result
+)
 
 # Define a lock file path in temp directory to prevent multiple app instances
 lock_file_path = os.path.join(tempfile.gettempdir(), "mod_option_selector.lock")
@@ -25,10 +32,29 @@ except OSError:
     messagebox.showerror("Already Running", "The application is already running.")
     sys.exit()
 
-# File paths for settings, zip package metadata, and theme configuration
+# File paths for settings, zip package metadata, theme configuration, the ledger and caches
 SETTINGS_FILE = 'data/settings.json'
 OPTIONS_FILE = 'data/mod_options.json'
 THEME_FILE = 'data/theme.json'
+LEDGER_FILE = 'data/install_ledger.json'
+STORE_DIR = 'data/.cache/store'
+PREVIEW_CACHE_DIR = 'data/.cache/previews'
+
+# Delay after the last canvas resize before the high-quality preview is drawn
+RESIZE_DEBOUNCE_MS = 150
+
+# Catalogs with more entries than this only keep a window of rows in the treeview
+VIRTUAL_TREE_THRESHOLD = 2000
+VIRTUAL_TREE_ROWS = 400    # Rows materialised at a time in virtual mode
+VIRTUAL_TREE_MARGIN = 50   # Move the window when the view gets this close to its edge
+
+# Tooltip lines for the warnings reported by the entry status engine
+WARNING_TEXT = {
+    "preview": "Missing preview image",
+    "chunk_id": "Missing chunk ID",
+    "replaces": "Missing 'replaces' field",
+    "description": "Missing description"
+}
 
 class ModOptionSelectorApp:
     def __init__(self, master):
@@ -49,8 +75,23 @@ class ModOptionSelectorApp:
         self.load_theme()
         self.load_zip_data()
 
-        self.last_zip_data_mtime = os.path.getmtime(OPTIONS_FILE)
-        self.master.after(2000, self.check_mod_options_data_changes)  # Check every 2 second
+        # Snapshot of the install directory used for all installed-status checks
+        self.install_index = InstallDirIndex(self.get_install_dir())
+
+        # Ledger of what was installed; used for status until the directory has been scanned
+        self.install_ledger = InstallLedger(LEDGER_FILE)
+        self.install_ledger.load()
+        self.install_check_pending = True
+
+        # Finish or roll back an install that was interrupted last time
+        if StagedInstall.recover(self.get_install_dir()) == "swapping":
+            messagebox.showwarning(self.app_name, "An install was interrupted last time and has been rolled back.")
+
+        # Watch mod_options.json and reload as soon as its contents change
+        self.options_watcher = create_file_watcher(
+            OPTIONS_FILE, lambda: self.master.after(0, self.check_mod_options_data_changes)
+        )
+        self.options_watcher.start()
 
         # Set background color according to theme or default dark gray
         master.configure(bg=self.theme.get("background", "#2e2e2e"))
@@ -97,37 +138,23 @@ class ModOptionSelectorApp:
         self.tree = ttk.Treeview(self.tree_container, show='tree')
         self.tree.pack(side="left", fill=BOTH, expand=True)
 
-        # Connect scrollbar and treeview vertical scrolling
-        self.tree.config(yscrollcommand=self.scrollbar.set)
-        self.scrollbar.config(command=self.tree.yview)
-
-        # Populate treeview with zip data
-        for i, item in enumerate(self.zip_data):
-            if not item.get("files"):
-                icon = self.error_image
-            else:
-                is_installed = self.is_installed(item)
-                missing_preview = not os.path.exists(item.get("preview", ""))
-                missing_chunk_id = not item.get("chunk_id")
-                missing_replaces = not item.get("replaces")
-                missing_description = not item.get("description")
-                has_warnings = missing_preview or missing_chunk_id or missing_replaces or missing_description
-
-                if is_installed and has_warnings:
-                    icon = self.check_caution_image
-                elif is_installed:
-                    icon = self.check_image
-                elif has_warnings:
-                    icon = self.caution_image
-                else:
-                    icon = ""
-
-            padded_title = "   " + item["title"]
-            self.tree.insert("", "end", iid=str(i), text=padded_title, image=icon)
-
-        # Auto-resize the treeview column width based on content width
-        self.auto_resize_tree_column()
-        self.update_tree_scrollbar_visibility()
+        # Connect scrollbar and treeview vertical scrolling (mapped in virtual mode)
+        self.tree.config(yscrollcommand=self.on_tree_yscroll)
+        self.scrollbar.config(command=self.on_tree_scrollbar)
+
+        # Populate treeview with zip data (status comes from the ledger at this point)
+        self.tree_iids = []     # Tree item id of each entry, by index in zip_data
+        self.iid_index = {}     # Tree item id -> index in zip_data
+        self.tree_rows = {}     # Tree item id -> (text, icon) currently shown
+        self.tree_entries = {}  # Tree item id -> entry data the row was built from
+        self.virtual_tree = False      # Only a window of rows is in the treeview
+        self.virtual_start = 0         # Index in zip_data of the first materialised row
+        self.virtual_after_id = None   # Pending move of the virtual window
+        self.tree_widths = TextWidthTracker()  # Widest entry title, kept up to date incrementally
+        self.entry_status = EntryStatusEngine(self.is_installed, self.install_state_token)
+        self.selected_iid = ""         # Focused entry, even when scrolled out of the window
+        self.shown_iid = ""            # Entry whose details and preview are shown
+        self.sync_tree()
 
         # Right frame to hold preview canvas for selected zip package
         self.right_frame = Frame(self.main_frame, bg=self.theme.get("background", "#2e2e2e"))
@@ -156,6 +183,19 @@ class ModOptionSelectorApp:
         )
         self.details_label.pack(anchor="w")
 
+        # Progress bar and cancel button, only shown while an install job runs
+        self.install_job = None
+        self.install_job_context = None
+        self.closing = False  # Exit requested; waiting for the install job to stop
+        self.plan_pending = False  # A multi-option install is being planned
+        self.progress_frame = Frame(self.right_frame, bg=self.theme.get("background", "#2e2e2e"))
+        self.progress_text = StringVar()
+        ttk.Label(self.progress_frame, textvariable=self.progress_text).pack(anchor="w")
+        self.progress_bar = ttk.Progressbar(self.progress_frame, orient="horizontal", mode="determinate")
+        self.progress_bar.pack(side="left", fill="x", expand=True)
+        self.cancel_button = ttk.Button(self.progress_frame, text="Cancel", command=self.cancel_install_job)
+        self.cancel_button.pack(side="left", padx=(5, 0))
+
         # Frame to hold buttons at the bottom
         button_frame = Frame(master, bg=self.theme.get("background", "#2e2e2e"))
         button_frame.pack(pady=(10, 10))
@@ -167,6 +207,9 @@ class ModOptionSelectorApp:
         # Button to set installation directory
         self.set_dir_button = ttk.Button(button_frame, text="Set Install Directory", command=self.set_install_dir)
         self.set_dir_button.pack(side="left", padx=5)
+        # Button to check installed files against the archives
+        self.verify_button = ttk.Button(button_frame, text="Verify Files", command=self.verify_installed_options)
+        self.verify_button.pack(side="left", padx=5)
         install_dir = self.get_install_dir()
         if install_dir:
             self.set_dir_button = WidgetToolTip(self.set_dir_button, install_dir, theme=self.theme)
@@ -201,28 +244,37 @@ class ModOptionSelectorApp:
         self.exit_button = ttk.Button(button_frame, text="Exit", command=self.confirm_exit)
         self.exit_button.pack(side="left", padx=5)
 
-        # Store the original PIL Image for the preview (used for resizing)
-        self.current_preview_image = None
+        # Path of the preview shown for the selected entry (used for resizing)
+        self.current_preview_path = None
+        self.resize_after_id = None  # Pending high-quality redraw after a resize
+
+        # Recently shown previews, decoded and resized, loaded on worker threads
+        # Decoded images are capped to the screen size, the largest the canvas can get
+        self.preview_cache = PreviewCache(
+            self.settings.get("PreviewCacheMB", 256) * 1024 * 1024,
+            thumbnails=ThumbnailStore(PREVIEW_CACHE_DIR),
+            max_size=(self.master.winfo_screenwidth(), self.master.winfo_screenheight()))
+        self.preview_loader = PreviewLoader(self.master, self.preview_cache, self.settings.get("PreviewWorkers", 2))
 
         # Bind treeview selection event to show preview of selected zip
         self.tree.bind("<<TreeviewSelect>>", self.show_preview)
 
         # Select first item by default and show its preview
-        if self.tree.get_children():
-            first_id = self.tree.get_children()[0]
-            self.tree.selection_set(first_id)
-            self.tree.focus(first_id)
-            self.tree.see(first_id)
+        if self.tree_iids:
+            self.select_entry(self.tree_iids[0])
             self.show_preview(None)
         
         self.tree_tooltip = TreeviewToolTip(self.tree, theme=self.theme)
         self.last_tree_item = None  # Track last hovered item
         self.tree.bind("<Motion>", self.on_tree_hover)
 
+        # Scan the install directory in the background to catch ledger drift
+        self.start_install_check()
+
     def update_tree_scrollbar_visibility(self):
         self.tree.update_idletasks()  # Ensure layout is updated
 
-        needs_scrollbar = self.tree.yview() != (0.0, 1.0)
+        needs_scrollbar = self.virtual_tree or self.tree.yview() != (0.0, 1.0)
         if needs_scrollbar:
             self.scrollbar.pack(side="right", fill="y")
         else:
@@ -235,91 +287,356 @@ class ModOptionSelectorApp:
         """
         return self.settings.get("install_dir", "")
 
+    def sync_install_index(self, wait=False):
+        """
+        Make sure the install directory snapshot matches the configured
+        install directory and is up to date with what is on disk.
+        While the startup scan is still running the ledger is used instead,
+        unless wait is True (needed before actually changing files).
+        """
+        if self.install_check_pending:
+            if not wait:
+                return
+            # Take over from the background scan; its result will be ignored
+            self.install_check_pending = False
+        self.install_index.set_install_dir(self.get_install_dir())
+        self.install_index.ensure_fresh()
+
+    def start_install_check(self):
+        """
+        Scan the install directory on a worker thread, then compare the result
+        with the install ledger on the UI thread.
+        """
+        install_dir = self.get_install_dir()
+        self.install_check_pending = True
+        self.install_check_token = token = object()  # Results of older scans are ignored
+
+        def worker():
+            index = InstallDirIndex(install_dir)
+            index.rebuild()
+            self.master.after(0, lambda: self.finish_install_check(index, token))
+
+        threading.Thread(target=worker, daemon=True).start()
+
+    def finish_install_check(self, index, token):
+        """
+        Adopt the background scan result, forget ledger records that no longer
+        match the disk and refresh the icons.
+        """
+        if not self.install_check_pending or token is not self.install_check_token:
+            return  # A newer scan already took over
+        if index.install_dir != self.get_install_dir():
+            self.start_install_check()  # The install directory changed meanwhile
+            return
+        self.install_check_pending = False
+        self.install_index = index
+
+        drifted = self.install_ledger.find_drift(index)
+        if drifted:
+            print(f"Install ledger out of date for: {', '.join(drifted)}")
+            for key in drifted:
+                self.install_ledger.entries.pop(key, None)
+            self.install_ledger.generation += 1
+            self.install_ledger.save()
+
+        self.refresh_tree_icons()
+        self.update_install_button()
+
     def check_mod_options_data_changes(self):
+        """
+        Called on the UI thread by the file watcher after the contents of
+        mod_options.json changed (writes are already debounced).
+        """
         try:
-            current_mtime = os.path.getmtime(OPTIONS_FILE)
-            if current_mtime != self.last_zip_data_mtime:
-                print("Detected change in mod_options.json, refreshing...")
-                self.last_zip_data_mtime = current_mtime
-                self.reload_zip_data()
+            print("Detected change in mod_options.json, refreshing...")
+            self.reload_zip_data()
         except Exception as e:
-            print(f"Error checking mod_options.json: {e}")
-
-        self.master.after(2000, self.check_mod_options_data_changes)  # Repeat every 2 seconds
+            print(f"Error reloading mod_options.json: {e}")
 
     def reload_zip_data(self):
+        """
+        Reload mod_options.json and update only the tree rows that changed,
+        keeping the user's selection and scroll position.
+        """
+        previous_focus = self.focused_iid()
+        previous_entry = self.zip_data[self.iid_index[previous_focus]] if previous_focus else None
+        first_visible = self.tree.yview()[0]
+
         self.load_zip_data()
+        self.sync_install_index()
+        changed = self.sync_tree()
+        # Pick up install directory changes made outside the app; only changed icons are redrawn
+        self.refresh_tree_icons()
 
-        # Clear Treeview
-        for item in self.tree.get_children():
-            self.tree.delete(item)
+        if changed and not self.virtual_tree:
+            self.tree.yview_moveto(first_visible)
 
-        # Re-populate Treeview
-        for i, item in enumerate(self.zip_data):
-            if not item.get("files"):
-                icon = self.error_image
+        if previous_focus in self.iid_index:
+            # Same entry still selected; only refresh the details if it was edited
+            if self.zip_data[self.iid_index[previous_focus]] != previous_entry:
+                self.show_preview(None)
             else:
-                is_installed = self.is_installed(item)
-                missing_preview = not os.path.exists(item.get("preview", ""))
-                missing_chunk_id = not item.get("chunk_id")
-                missing_replaces = not item.get("replaces")
-                missing_description = not item.get("description")
-                has_warnings = missing_preview or missing_chunk_id or missing_replaces or missing_description
-
-                if is_installed and has_warnings:
-                    icon = self.check_caution_image
-                elif is_installed:
-                    icon = self.check_image
-                elif has_warnings:
-                    icon = self.caution_image
-                else:
-                    icon = ""
+                self.update_install_button()
+        elif self.tree_iids:
+            # Selected entry was removed; select first item
+            self.select_entry(self.tree_iids[0])
+            self.show_preview(None)
+        else:
+            self.preview_loader.cancel()
+            self.preview_canvas.delete("all")
+            self.current_preview_path = None
+            self.details_text.set("")
+            self.update_install_button()
+
+    def entry_iids(self):
+        """
+        Build a stable tree item id for every entry from its title (and how many
+        earlier entries share that title), so rows can be matched across reloads.
+        """
+        seen = {}
+        iids = []
+        for item in self.zip_data:
+            title = item.get("title", "")
+            count = seen.get(title, 0)
+            seen[title] = count + 1
+            iids.append(f"entry:{title}:{count}")
+        return iids
+
+    def entry_icon(self, status):
+        """
+        Return the status icon for an entry status from the status engine.
+        """
+        if not status["has_files"]:
+            return self.error_image
 
-            padded_title = "   " + item["title"]
-            self.tree.insert("", "end", iid=str(i), text=padded_title, image=icon)
+        is_installed = status["installed"]
+        has_warnings = bool(status["warnings"])
 
+        if is_installed and has_warnings:
+            return self.check_caution_image
+        elif is_installed:
+            return self.check_image
+        elif has_warnings:
+            return self.caution_image
+        return ""
+
+    def install_state_token(self):
+        """
+        Value that changes whenever installed flags may have changed: another
+        install directory, a new snapshot or new ledger records.
+        """
+        return (self.get_install_dir(), self.install_check_pending, id(self.install_index),
+                self.install_index.generation, self.install_ledger.generation)
+
+    def sync_tree(self):
+        """
+        Bring the treeview in line with zip_data. Catalogs with more than
+        VIRTUAL_TREE_THRESHOLD entries switch to virtual mode, where only a
+        window of VIRTUAL_TREE_ROWS rows around the view is materialised and
+        the rest are filled in as the user scrolls.
+        Returns True if any row changed.
+        """
+        self.tree_iids = self.entry_iids()
+        self.iid_index = {iid: i for i, iid in enumerate(self.tree_iids)}
+        self.virtual_tree = len(self.tree_iids) > VIRTUAL_TREE_THRESHOLD
+        self.entry_status.retain(self.tree_iids)
+        changed = self.sync_tree_rows(self.virtual_start if self.virtual_tree else 0)
+
+        # Auto-resize the treeview column width based on content width (this
+        # also covers entries outside the virtual window)
         self.auto_resize_tree_column()
-        self.update_tree_scrollbar_visibility()
-
-        # Reselect first item (optional)
-        if self.tree.get_children():
-            first_id = self.tree.get_children()[0]
-            self.tree.selection_set(first_id)
-            self.tree.focus(first_id)
-            self.tree.see(first_id)
-            self.show_preview(None)
+        if changed:
+            self.update_tree_scrollbar_visibility()
+        return changed
+
+    def sync_tree_rows(self, start):
+        """
+        Materialise the rows of entries from index start (all of them outside
+        virtual mode) using a keyed diff: rows no longer wanted are deleted,
+        new ones inserted, moved ones moved and only edited entries get their
+        text and icon recomputed. Returns True if any row changed.
+        """
+        if self.virtual_tree:
+            start = max(0, min(start, len(self.tree_iids) - VIRTUAL_TREE_ROWS))
+            end = start + VIRTUAL_TREE_ROWS
+        else:
+            start, end = 0, len(self.tree_iids)
+        self.virtual_start = start
+        new_iids = self.tree_iids[start:end]
+        new_set = set(new_iids)
+        changed = False
+        self.entry_status.check_sources()
+
+        # Delete rows that are gone or out of the window
+        current = []
+        for iid in self.tree.get_children():
+            if iid in new_set:
+                current.append(iid)
+            else:
+                self.tree.delete(iid)
+                del self.tree_rows[iid]
+                del self.tree_entries[iid]
+                changed = True
+
+        for position, (iid, item) in enumerate(zip(new_iids, self.zip_data[start:end])):
+            # Insert or move the row to its new position
+            if position >= len(current) or current[position] != iid:
+                if iid in self.tree_rows:
+                    current.remove(iid)
+                    self.tree.move(iid, "", position)
+                else:
+                    self.tree.insert("", position, iid=iid)
+                    self.tree_rows[iid] = None
+                current.insert(position, iid)
+                changed = True
+
+            # Rebuild text and icon only for new or edited entries
+            if self.tree_entries.get(iid) != item:
+                self.tree_entries[iid] = dict(item)
+                row = ("   " + item["title"], self.entry_icon(self.entry_status.status(iid, item)))
+                if row != self.tree_rows[iid]:
+                    self.tree.item(iid, text=row[0], image=row[1])
+                    self.tree_rows[iid] = row
+                    changed = True
+
+        # Give focus back to the selected entry when it comes back into the window
+        if self.selected_iid in new_set and not self.tree.focus():
+            self.tree.focus(self.selected_iid)
+            self.tree.selection_set(self.selected_iid)
+        return changed
+
+    def focused_iid(self):
+        """
+        Return the item id of the focused entry (or ""). In virtual mode its
+        row may have been scrolled out of the materialised window.
+        """
+        iid = self.tree.focus()
+        if iid:
+            self.selected_iid = iid
+        elif self.selected_iid not in self.iid_index:
+            self.selected_iid = ""
+        return self.selected_iid
+
+    def on_tree_yscroll(self, first, last):
+        """
+        Pass the treeview's scroll position on to the scrollbar. In virtual
+        mode the position is mapped from the materialised rows to the whole
+        catalog, and the window is moved once the view gets within
+        VIRTUAL_TREE_MARGIN rows of either end of it.
+        """
+        if not self.virtual_tree or not self.tree_rows:
+            self.scrollbar.set(first, last)
+            return
+        count = len(self.tree_rows)
+        total = len(self.tree_iids)
+        top = self.virtual_start + float(first) * count
+        bottom = self.virtual_start + float(last) * count
+        self.scrollbar.set(top / total, bottom / total)
+
+        near_top = self.virtual_start > 0 and top - self.virtual_start < VIRTUAL_TREE_MARGIN
+        near_bottom = self.virtual_start + count < total and self.virtual_start + count - bottom < VIRTUAL_TREE_MARGIN
+        if (near_top or near_bottom) and self.virtual_after_id is None:
+            # Not while Tk is still updating the view
+            self.virtual_after_id = self.master.after_idle(self.scroll_virtual_tree)
+
+    def on_tree_scrollbar(self, *args):
+        """
+        Scrollbar command: dragging in virtual mode jumps the window to the
+        matching entry, everything else scrolls the treeview directly.
+        """
+        if self.virtual_tree and args[0] == "moveto":
+            self.scroll_virtual_tree(int(float(args[1]) * len(self.tree_iids)))
+        else:
+            self.tree.yview(*args)
+
+    def scroll_virtual_tree(self, top=None):
+        """
+        Move the virtual window so entry index top (default: the first visible
+        row) is a third of the way into it, and show that row at the top.
+        """
+        self.virtual_after_id = None
+        if not self.virtual_tree or not self.tree_rows:
+            return
+        if top is None:
+            top = self.virtual_start + int(self.tree.yview()[0] * len(self.tree_rows))
+        top = max(0, min(top, len(self.tree_iids) - 1))
+        start = max(0, top - VIRTUAL_TREE_ROWS // 3)
+        self.sync_tree_rows(start)  # Rows brought in get a fresh text and icon
+        self.tree.yview_moveto((top - self.virtual_start) / len(self.tree_rows))
+
+    def select_entry(self, iid):
+        """
+        Select, focus and scroll to an entry's row, materialising it first in
+        virtual mode.
+        """
+        self.selected_iid = iid
+        if iid not in self.tree_rows:
+            self.scroll_virtual_tree(self.iid_index[iid])
+        self.tree.selection_set(iid)
+        self.tree.focus(iid)
+        self.tree.see(iid)
 
     def auto_resize_tree_column(self):
         """
         Adjust the width of the treeview's single column based on the widest item text,
-        plus some padding for icons and spacing.
+        plus some padding for icons and spacing. Only entries added or renamed
+        since the last call are measured.
         """
         padding = 40  # extra space for icon/padding
 
         style = ttk.Style()
         tree_font_name = style.lookup("Treeview", "font")  # Get treeview font name
         tree_font = font.nametofont(tree_font_name)        # Get font object for measuring text width
+        self.tree_widths.set_font(tree_font_name, tree_font.measure)
 
-        max_text_width = 0
-
-        # Find the widest text among all tree items
-        for item_id in self.tree.get_children():
-            text = self.tree.item(item_id, "text")
-            text_width = tree_font.measure(text)
-            max_text_width = max(max_text_width, text_width)
+        # Bring the width tracker up to date with every entry, including rows not materialised
+        self.tree_widths.sync({iid: "   " + item["title"] for iid, item in zip(self.tree_iids, self.zip_data)})
+        max_text_width = self.tree_widths.max_width()
 
         # Set column width to max width + padding or minimum 200 px
         new_width = max(200, max_text_width + padding)
-        self.tree.column("#0", width=new_width)
+        if new_width != self.tree.column("#0", "width"):
+            self.tree.column("#0", width=new_width)
 
     def confirm_exit(self):
         """
         Confirm exit dialog if configured in settings. Quits the main loop if confirmed or no prompt set.
+        A running install job is cancelled (and its partial files removed) first.
         """
         if self.settings.get("PromptBeforeExit", False):
             answer = messagebox.askyesno(self.app_name, "Are you sure you want to exit?")
             if not answer:
                 return
+        if self.closing:
+            return  # Already waiting for the install job to stop
+        if self.install_job:
+            # Joining here would deadlock: the job hands its result to this thread
+            self.closing = True
+            self.exit_button.config(state="disabled")
+            self.install_job.cancel()
+            self.progress_text.set("Cancelling...")
+            self.exit_when_job_done(self.install_job)
+            return
+        self.finish_exit()
+
+    def exit_when_job_done(self, job):
+        """
+        Wait (without blocking the main loop) for the cancelled job to stop,
+        then record its result and quit.
+        """
+        if job.thread.is_alive():
+            self.master.after(50, lambda: self.exit_when_job_done(job))
+            return
+        if self.install_job is job:
+            self.finish_install_job(job)
+        self.finish_exit()
+
+    def finish_exit(self):
+        """
+        Stop the background workers and quit the main loop.
+        """
+        self.options_watcher.stop()
+        self.preview_loader.shutdown()
         self.master.quit()
 
     def load_theme(self):
@@ -405,6 +722,12 @@ class ModOptionSelectorApp:
                         fieldbackground=self.theme.get("background", "#2e2e2e"))
         style.map("Treeview", background=[("selected", self.theme.get("select_bg", "#444"))])
 
+        # Configure install progress bar colors
+        style.configure("Horizontal.TProgressbar",
+                        background=self.theme.get("button_active_bg", "#666"),
+                        troughcolor=self.theme.get("button_bg", "#444"),
+                        borderwidth=0)
+
     def load_settings(self):
         """
         Load settings JSON file, set defaults if missing or invalid.
@@ -425,6 +748,12 @@ class ModOptionSelectorApp:
         self.settings.setdefault("CanInstallMultiple", False)
         self.settings.setdefault("PromptUser", False)
         self.settings.setdefault("PromptBeforeExit", False)
+        self.settings.setdefault("IncrementalInstall", True)
+        self.settings.setdefault("UseExtractStore", True)
+        self.settings.setdefault("ExtractWorkers", 0)  # 0 = one thread per CPU core
+        self.settings.setdefault("PreviewCacheMB", 256)
+        self.settings.setdefault("PreviewWorkers", 2)
+        self.settings.setdefault("PreviewPrefetch", 2)  # Entries prefetched on each side of the selection
 
     def save_settings(self):
         """
@@ -461,29 +790,23 @@ class ModOptionSelectorApp:
             self.mod_version.set(version_display)
 
         self.zip_data = data.get("entries", [])
+        self.file_owners = FileOwnerIndex(self.zip_data)  # Which entries list each file
 
     def show_preview(self, event):
         """
-        Show preview image of the currently selected zip item.
+        Show preview image and details of the currently selected zip item.
+        The details appear immediately; the image is loaded in the background.
         """
-        selected_id = self.tree.focus()
+        if event is not None and self.tree.focus() in ("", self.shown_iid):
+            return  # Focused row only left or re-entered the virtual window
+        selected_id = self.focused_iid()
         if not selected_id:
             return
+        self.shown_iid = selected_id
 
-        index = int(selected_id)
+        index = self.iid_index[selected_id]
         preview_path = self.zip_data[index]["preview"]
 
-        try:
-            # Open preview image and store original for resizing
-            image = Image.open(preview_path)
-            self.current_preview_image = image
-            self.resize_preview_image()
-        except Exception as e:
-            # On failure, clear preview and reset image reference
-            print(f"Error loading preview image: {e}")
-            self.preview_canvas.delete("all")
-            self.current_preview_image = None
-
         # Populate the details box
         # Populate the details box, including the mod name
         mod_title = self.zip_data[index].get("title", "Unknown Title")
@@ -503,11 +826,42 @@ class ModOptionSelectorApp:
         # Update install/uninstall button text based on current selection
         self.update_install_button()
 
+        # Clear the old entry's image and request the new one
+        self.preview_canvas.delete("all")
+        self.current_preview_path = preview_path
+        self.resize_preview_image()
+
+        # Get the neighbouring previews ready for sequential browsing
+        self.prefetch_neighbour_previews(index)
+
+    def prefetch_neighbour_previews(self, index):
+        """
+        Prefetch the previews of the next/previous PreviewPrefetch entries,
+        scaled to the current canvas size, nearest entries first.
+        """
+        count = self.settings.get("PreviewPrefetch", 2)
+        canvas_width = self.preview_canvas.winfo_width()
+        canvas_height = self.preview_canvas.winfo_height()
+        if count <= 0 or canvas_width < 10 or canvas_height < 10:
+            return
+
+        paths = []
+        for distance in range(1, count + 1):
+            for neighbour in (index + distance, index - distance):
+                if 0 <= neighbour < len(self.zip_data):
+                    paths.append(self.zip_data[neighbour].get("preview", ""))
+        self.preview_loader.prefetch(paths, canvas_width, canvas_height)
+
     def resize_preview_image(self, event=None):
         """
-        Resize preview image to fit inside the preview canvas while maintaining aspect ratio.
+        Request the preview image scaled to fit inside the preview canvas while
+        maintaining aspect ratio. It is drawn once ready (at once if cached).
+
+        When called for a canvas resize (event is set), a cheap low-quality
+        version is drawn right away and the high-quality one only once the
+        resize events stop for RESIZE_DEBOUNCE_MS.
         """
-        if not self.current_preview_image:
+        if not self.current_preview_path:
             return
 
         canvas_width = self.preview_canvas.winfo_width()
@@ -517,21 +871,35 @@ class ModOptionSelectorApp:
         if canvas_width < 10 or canvas_height < 10:
             return
 
-        img = self.current_preview_image
-        img_ratio = img.width / img.height
-        canvas_ratio = canvas_width / canvas_height
+        if event is not None:
+            photo = self.preview_cache.lookup_photo(self.current_preview_path, canvas_width, canvas_height)
+            if photo is None:
+                photo = self.preview_cache.fast_photo(self.current_preview_path, canvas_width, canvas_height)
+            if photo is not None:
+                self.draw_preview_photo(photo)
+            if self.resize_after_id:
+                self.master.after_cancel(self.resize_after_id)
+            self.resize_after_id = self.master.after(RESIZE_DEBOUNCE_MS, self.finish_preview_resize)
+            return
 
-        # Calculate new size preserving aspect ratio
-        if img_ratio > canvas_ratio:
-            new_width = canvas_width
-            new_height = int(canvas_width / img_ratio)
-        else:
-            new_height = canvas_height
-            new_width = int(canvas_height * img_ratio)
+        self.preview_loader.request(
+            self.current_preview_path, canvas_width, canvas_height,
+            self.draw_preview_photo, self.preview_load_failed
+        )
+
+    def finish_preview_resize(self):
+        """
+        Draw the high-quality preview once the canvas has stopped resizing.
+        """
+        self.resize_after_id = None
+        self.resize_preview_image()
 
-        # Resize image using high-quality resampling filter
-        resized = img.resize((new_width, new_height), Image.Resampling.LANCZOS)
-        photo = ImageTk.PhotoImage(resized)
+    def draw_preview_photo(self, photo):
+        """
+        Draw a ready PhotoImage centered on the preview canvas.
+        """
+        canvas_width = self.preview_canvas.winfo_width()
+        canvas_height = self.preview_canvas.winfo_height()
 
         # Clear canvas and draw resized image centered
         self.preview_canvas.delete("all")
@@ -540,6 +908,14 @@ class ModOptionSelectorApp:
         # Keep reference to PhotoImage to prevent garbage collection
         self.preview_canvas.image = photo
 
+    def preview_load_failed(self, error):
+        """
+        On failure, clear preview and reset image reference.
+        """
+        print(f"Error loading preview image: {error}")
+        self.preview_canvas.delete("all")
+        self.current_preview_path = None
+
     def set_install_dir(self):
         """
         Open a dialog for user to select installation directory and save it to settings.
@@ -548,21 +924,28 @@ class ModOptionSelectorApp:
         if directory:
             self.settings["install_dir"] = directory
             self.save_settings()
-            # Update UI and buttons to reflect new install directory
-            self.update_install_button()
-            self.refresh_tree_icons()
+            self.install_dir_changed()
+
+    def install_dir_changed(self):
+        """
+        Scan the new install directory in the background (the ledger answers
+        meanwhile) and update the UI and buttons to reflect it.
+        """
+        self.start_install_check()
+        self.update_install_button()
+        self.refresh_tree_icons()
 
     def update_install_button(self):
         """
         Update install/uninstall button text depending on whether
         the selected zip is currently installed.
         """
-        selected_id = self.tree.focus()
+        selected_id = self.focused_iid()
         if not selected_id:
             self.install_button.config(text="Install")
             return
 
-        index = int(selected_id)
+        index = self.iid_index[selected_id]
         selected = self.zip_data[index]
         install_dir = self.settings.get("install_dir")
 
@@ -572,50 +955,45 @@ class ModOptionSelectorApp:
             return
 
         # Check if all files for this zip exist in install directory
-        all_exist = all(os.path.exists(os.path.join(install_dir, f)) for f in selected["files"])
+        self.sync_install_index()
+        all_exist = self.is_installed(selected)
         # Set button text accordingly
         self.install_button.config(text="Uninstall" if all_exist else "Install")
 
-    def uninstall_files(self, files):
+    def installed_files(self, files):
         """
-        Remove given list of files from the installation directory.
+        Return the subset of the given files that exist in the installation directory.
         """
-        install_dir = self.settings.get("install_dir")
-        for f in files:
-            path = os.path.join(install_dir, f)
-            if os.path.exists(path):
-                try:
-                    os.remove(path)
-                except Exception as e:
-                    print(f"Could not remove {path}: {e}")
+        return installed_files(self.install_index, files)
 
-    def uninstall_other_zips(self, current_index):
+    def other_zip_files(self, current_index):
         """
-        Uninstall all other installed zip packages except the one at current_index.
+        Collect the installed files of all other zip packages except the one at
+        current_index, so the install job can remove them before extracting.
+        Returns the affected items and the list of files to remove.
         """
-        install_dir = self.settings.get("install_dir")
-        for i, item in enumerate(self.zip_data):
-            if i == current_index:
-                continue
-            if "files" in item:
-                for f in item["files"]:
-                    path = os.path.join(install_dir, f)
-                    if os.path.exists(path):
-                        try:
-                            os.remove(path)
-                        except Exception as e:
-                            print(f"Could not remove {path}: {e}")
+        return other_installed_entries(self.install_index, self.file_owners, current_index, self.install_ledger)
 
     def install_or_uninstall(self):
         """
         Triggered when user clicks install/uninstall button.
         Installs or uninstalls the selected zip package accordingly,
         handling prompts and multiple install settings.
+        The file work itself runs as a background install job.
         """
-        selected_id = self.tree.focus()
+        if self.install_job or self.plan_pending:
+            return  # Only one job at a time
+
+        # Several selected options: install exactly those (a preset)
+        selection = [iid for iid in self.tree.selection() if iid in self.iid_index]
+        if len(selection) > 1:
+            self.plan_selected_options([self.iid_index[iid] for iid in selection])
+            return
+
+        selected_id = self.focused_iid()
         if not selected_id:
             return
-        selected_index = int(selected_id)
+        selected_index = self.iid_index[selected_id]
         selected = self.zip_data[selected_index]
         install_dir = self.settings.get("install_dir")
 
@@ -627,84 +1005,297 @@ class ModOptionSelectorApp:
                 return  # User cancelled
 
         # Check if zip is currently installed (all files present)
-        is_installed = all(os.path.exists(os.path.join(install_dir, f)) for f in selected.get("files", []))
+        self.sync_install_index(wait=True)
+        is_installed = self.install_index.has_all(selected.get("files", []))
 
         if is_installed:
+            # Files shared with other installed options are removed too
+            shared_with = [self.zip_data[i]["title"] for i in sorted(self.file_owners.occupying(self.install_index, selected_index, self.install_ledger))
+                           if self.install_index.has_all(self.zip_data[i].get("files", []))]
             # If installed, confirm uninstall if prompt enabled
             if self.settings.get("PromptUser", False):
-                answer = messagebox.askyesno(f"{self.app_name} - Confirm Uninstall", f"Do you want to uninstall '{selected['title']}'?")
+                shared_note = f"\nThis also removes files used by: {', '.join(shared_with)}" if shared_with else ""
+                answer = messagebox.askyesno(f"{self.app_name} - Confirm Uninstall", f"Do you want to uninstall '{selected['title']}'?{shared_note}")
                 if not answer:
                     return
-            # Uninstall files and update button
-            self.uninstall_files(selected["files"])
-            self.install_button.config(text="Install")
+            elif shared_with:
+                print(f"Uninstalling '{selected['title']}' also removes files used by: {', '.join(shared_with)}")
+            # Uninstall files in the background
+            self.start_install_job(selected, [selected], self.installed_files(selected["files"]), None)
         else:
+            remove_items, remove_files = [], []
             # If not installed, handle multiple installs setting
             if not self.settings.get("CanInstallMultiple", False):
-                other_installed = False
-                for i, item in enumerate(self.zip_data):
-                    if i == selected_index:
-                        continue
-                    if "files" in item:
-                        # Check if other zip is installed
-                        if all(os.path.exists(os.path.join(install_dir, f)) for f in item["files"]):
-                            other_installed = True
-                            break
-                # Prompt user if another zip is installed and prompts enabled
-                if other_installed and self.settings.get("PromptUser", False):
+                # Uninstall other zips in the same job if multiple installs not allowed
+                remove_items, remove_files = self.other_zip_files(selected_index)
+                other_installed = [item for item in remove_items if self.install_index.has_all(item["files"])]
+                partly_installed = [item for item in remove_items if item not in other_installed]
+
+                # Prompt user if another zip is (even partly) installed and prompts enabled
+                if remove_items and self.settings.get("PromptUser", False):
+                    message = "Another option is already installed." if other_installed else ""
+                    if partly_installed:
+                        names = "\n".join(f"- {item['title']}" for item in partly_installed)
+                        message += f"\nFiles of these options are present and will be removed:\n{names}\n"
                     answer = messagebox.askyesno(f"{self.app_name} - Confirm Replace",
-                        f"Another option is already installed.\nDo you want to uninstall it and install '{selected['title']}'?")
+                        f"{message.strip()}\nDo you want to uninstall it and install '{selected['title']}'?")
                     if not answer:
                         return
+            else:
+                # Options sharing files with this one get those files overwritten
+                occupied = self.file_owners.occupying(self.install_index, selected_index, self.install_ledger)
+                if occupied:
+                    names = "\n".join(f"- {self.zip_data[i]['title']} ({len(files)} files)" for i, files in sorted(occupied.items()))
+                    if self.settings.get("PromptUser", False):
+                        answer = messagebox.askyesno(f"{self.app_name} - Confirm Overwrite",
+                            f"'{selected['title']}' shares installed files with:\n{names}\nDo you want to overwrite them?")
+                        if not answer:
+                            return
+                    else:
+                        print(f"Installing '{selected['title']}' overwrites files of:\n{names}")
+
+            # Extract selected zip package to install directory in the background
+            self.start_install_job(selected, remove_items, remove_files, selected["zip_path"])
+
+    def start_install_job(self, selected, remove_items, remove_files, zip_path):
+        """
+        Start a background job that removes remove_files and then, if zip_path
+        is given, extracts it. Shows the progress bar until the job is done.
+        """
+        install_dir = self.settings.get("install_dir")
+        job = create_install_job(
+            self.settings, install_dir, remove_files, zip_path,
+            self.install_ledger, STORE_DIR, on_done=self.install_job_done)
+        self.run_install_job(job, (selected, remove_items), "Installing..." if zip_path else "Uninstalling...")
+
+    def install_job_done(self, job):
+        # Called on the worker thread; hand the result to the UI thread
+        # (unless the app is closing: exit_when_job_done picks it up then)
+        if not self.closing:
+            self.master.after(0, lambda: self.finish_install_job(job))
+
+    def run_install_job(self, job, context, text):
+        """
+        Start job on its worker thread and show the progress bar until it is done.
+        """
+        self.install_job = job
+        self.install_job_context = context
 
-            # Uninstall other zips if multiple installs not allowed
-            if not self.settings.get("CanInstallMultiple", False):
-                self.uninstall_other_zips(selected_index)
+        self.install_button.config(state="disabled")
+        self.cancel_button.config(state="normal")
+        self.progress_bar.config(mode="determinate", maximum=1, value=0)
+        self.progress_text.set(text)
+        self.progress_frame.pack(fill="x", padx=10, pady=(0, 10))
 
-            # Extract selected zip package to install directory
-            zip_path = selected["zip_path"]
-            with zipfile.ZipFile(zip_path, 'r') as zip_ref:
-                zip_ref.extractall(install_dir)
+        self.install_job.start()
+        self.master.after(100, self.poll_install_job)
 
-            self.install_button.config(text="Uninstall")
+    def plan_selected_options(self, positions):
+        """
+        Work out, on a worker thread, the minimal file changes that leave
+        exactly the selected options installed, then show them for
+        confirmation (a dry run) before anything is changed.
+        """
+        if not self.settings.get("install_dir"):
+            self.set_install_dir()
+            if not self.settings.get("install_dir"):
+                return  # User cancelled
+        positions = [p for p in sorted(positions) if self.zip_data[p].get("files")]
+        if not positions:
+            return
+
+        self.sync_install_index(wait=True)
+        install_dir = self.settings.get("install_dir")
+        index = self.install_index
+        owners = self.file_owners
+        known = self.install_ledger.known_files(install_dir)
+        ledger = self.install_ledger
+
+        self.plan_pending = True
+        self.install_button.config(state="disabled")
+        self.cancel_button.config(state="disabled")
+        self.progress_bar.config(mode="indeterminate")
+        self.progress_bar.start(20)
+        self.progress_text.set("Comparing installed files...")
+        self.progress_frame.pack(fill="x", padx=10, pady=(0, 10))
+
+        def worker():
+            try:
+                plan, error = plan_install(install_dir, index, owners, positions, known, ledger=ledger), None
+            except Exception as e:
+                plan, error = None, e
+            self.master.after(0, lambda: self.confirm_plan(plan, error))
+
+        threading.Thread(target=worker, daemon=True).start()
+
+    def confirm_plan(self, plan, error):
+        """
+        Show what applying the plan would change and run it if confirmed.
+        """
+        self.plan_pending = False
+        self.progress_bar.stop()
+        self.progress_frame.pack_forget()
+        self.install_button.config(state="normal")
+        if error:
+            messagebox.showerror("Error", f"Could not compare the selected options:\n{error}")
+            return
+        if plan.entries is not self.zip_data:
+            return  # mod_options.json was reloaded meanwhile
+
+        summary = plan.summary()
+        lines = [f"Install: {', '.join(summary['install'])}"]
+        if summary["uninstall"]:
+            lines.append(f"Uninstall: {', '.join(summary['uninstall'])}")
+        lines.append("")
+        if not (summary["create"] or summary["overwrite"] or summary["delete"]):
+            lines.append("The selected options are already installed; nothing to change.")
+            messagebox.showinfo(f"{self.app_name} - Apply Options", "\n".join(lines))
+            return
+        lines.append(f"{summary['create']} new files, {summary['overwrite']} overwritten, "
+                     f"{summary['delete']} deleted, {summary['untouched']} already up to date "
+                     f"({summary['write_bytes'] / (1024 * 1024):.1f} MB to write).")
+        lines.append("")
+        lines.append("Apply these changes?")
+        if not messagebox.askyesno(f"{self.app_name} - Apply Options", "\n".join(lines)):
+            return
+
+        job = create_plan_job(self.settings, plan, STORE_DIR, on_done=self.install_job_done)
+        self.run_install_job(job, (None, []), "Applying options...")
 
-        # Refresh the treeview icons to show updated install status
+    def verify_installed_options(self):
+        """
+        Check the files of every installed option against the size and CRC32
+        in its ZIP, in the background, and offer to repair damaged ones.
+        """
+        if self.install_job or self.plan_pending:
+            return  # Only one job at a time
+        install_dir = self.settings.get("install_dir")
+        if not install_dir:
+            messagebox.showinfo(f"{self.app_name} - Verify Files", "Set the install directory first.")
+            return
+
+        self.sync_install_index(wait=True)
+        positions = installed_entry_positions(self.zip_data, self.install_index, self.install_ledger)
+        if not positions:
+            messagebox.showinfo(f"{self.app_name} - Verify Files", "No options are installed.")
+            return
+        job = create_verify_job(self.settings, install_dir, self.zip_data, positions, False,
+                                STORE_DIR, on_done=self.install_job_done)
+        self.run_install_job(job, (None, []), "Verifying files...")
+
+    def finish_verify_job(self, job):
+        """
+        Report the result of a verify (or repair) job and offer to repair.
+        """
+        record_verify_result(self.install_ledger, self.install_index, job)
         self.refresh_tree_icons()
+        self.update_install_button()
+
+        title = f"{self.app_name} - Verify Files"
+        if job.error:
+            messagebox.showerror("Error", f"Could not verify the installed files:\n{job.error}")
+        elif job.cancelled:
+            print("Verify job was cancelled")
+        elif job.repair:
+            print(f"Repaired {len(job.problems)} files in {job.elapsed:.2f}s")
+            messagebox.showinfo(title, f"Repaired {len(job.problems)} files.")
+        elif not job.problems:
+            print(f"Verified {len(job.plan.members)} files in {job.elapsed:.2f}s")
+            messagebox.showinfo(title, f"All {len(job.plan.members)} installed files are intact.")
+        else:
+            shown = [f"{path} ({problem})" for path, problem in job.problems[:10]]
+            if len(job.problems) > len(shown):
+                shown.append(f"... and {len(job.problems) - len(shown)} more")
+            if messagebox.askyesno(title, f"{len(job.problems)} of {len(job.plan.members)} installed files "
+                                          f"are missing or damaged:\n\n" + "\n".join(shown) +
+                                          "\n\nRe-extract them from the mod ZIPs?"):
+                self.run_install_job(job.repair_job(on_done=self.install_job_done), (None, []), "Repairing files...")
+
+    def poll_install_job(self):
+        """
+        Update the progress bar from the running job every 100 ms.
+        """
+        job = self.install_job
+        if not job:
+            return
+        if job.total_bytes:
+            self.progress_bar.config(maximum=job.total_bytes, value=job.done_bytes)
+        if job.message:
+            self.progress_text.set(job.message)
+        self.master.after(100, self.poll_install_job)
+
+    def cancel_install_job(self):
+        """
+        Ask the running install job to stop.
+        """
+        if self.install_job:
+            self.install_job.cancel()
+            self.cancel_button.config(state="disabled")
+            self.progress_text.set("Cancelling...")
+
+    def finish_install_job(self, job):
+        """
+        Apply the result of a finished install job to the ledger and the UI.
+        """
+        selected, remove_items = self.install_job_context
+        self.install_job = None
+        self.install_job_context = None
+        self.progress_frame.pack_forget()
+        self.install_button.config(state="normal")
+        if isinstance(job, VerifyJob):
+            self.finish_verify_job(job)
+            return
+
+        # Forget the options that were replaced (or lost files before a cancel),
+        # record what was extracted; files changed, so the snapshot is rebuilt
+        if isinstance(job, ApplyPlanJob):
+            record_plan_result(self.install_ledger, self.install_index, job)
+        else:
+            record_install_result(self.install_ledger, self.install_index, job, selected, remove_items)
+        name = f"'{selected['title']}'" if selected else "the selected options"
+
+        # Refresh the treeview icons and button to show updated install status
+        self.refresh_tree_icons()
+        self.update_install_button()
+
+        if job.error:
+            messagebox.showerror("Error", f"Could not install {name}:\n{job.error}")
+        elif job.cancelled:
+            print(f"Install job for {name} was cancelled")
+        else:
+            print(f"Install job for {name} finished in {job.elapsed:.2f}s "
+                  f"({len(job.skipped)} unchanged files skipped, {job.linked} files linked from cache)")
 
     def is_installed(self, item):
         """
         Check if all files listed in the item exist in the install directory.
         Returns True if installed, False otherwise.
+        Uses the install directory snapshot; call sync_install_index() first
+        when the directory may have changed. Until the startup scan finishes,
+        the install ledger answers instead.
         """
         install_dir = self.settings.get("install_dir")
-        return all(os.path.exists(os.path.join(install_dir, f)) for f in item.get("files", [])) if install_dir else False
+        if not install_dir:
+            return False
+        if self.install_check_pending:
+            return self.install_ledger.is_recorded(item, install_dir)
+        return self.install_index.has_all(item.get("files", []))
 
     def refresh_tree_icons(self):
         """
         Refresh the icons in the treeview based on installed status
-        or missing file metadata.
+        or missing file metadata. Statuses are memoized, so only entries whose
+        inputs changed are recomputed and only changed icons are redrawn.
         """
-        for i, item in enumerate(self.zip_data):
-            if not item.get("files"):
-                icon = self.error_image
-            else:
-                is_installed = self.is_installed(item)
-                missing_preview = not os.path.exists(item.get("preview", ""))
-                missing_chunk_id = not item.get("chunk_id")
-                missing_replaces = not item.get("replaces")
-                missing_description = not item.get("description")
-                has_warnings = missing_preview or missing_chunk_id or missing_replaces or missing_description
-
-                if is_installed and has_warnings:
-                    icon = self.check_caution_image
-                elif is_installed:
-                    icon = self.check_image
-                elif has_warnings:
-                    icon = self.caution_image
-                else:
-                    icon = ""
-
-            self.tree.item(str(i), image=icon)
+        self.sync_install_index()
+        # Only materialised rows; the rest get their icon when scrolled into view
+        statuses = self.entry_status.statuses((iid, self.zip_data[self.iid_index[iid]]) for iid in self.tree_rows)
+        for iid, status in statuses.items():
+            text, icon = self.tree_rows[iid]
+            new_icon = self.entry_icon(status)
+            if new_icon != icon:
+                self.tree.item(iid, image=new_icon)
+                self.tree_rows[iid] = (text, new_icon)
 
     def on_tree_hover(self, event):
         region = self.tree.identify("region", event.x, event.y)
@@ -723,26 +1314,19 @@ class ModOptionSelectorApp:
             return  # same item, do nothing
 
         self.last_tree_item = item_id
-        index = int(item_id)
+        index = self.iid_index[item_id]
         item = self.zip_data[index]
 
-        # Tooltip content
-        if not item.get("files"):
+        # Tooltip content, from the same memoized status as the icons
+        status = self.entry_status.status(item_id, item)
+        if not status["has_files"]:
             tooltip_text = "Error: No files were listed..."
         else:
-            warnings = []
-            if not os.path.exists(item.get("preview", "")):
-                warnings.append("Missing preview image")
-            if not item.get("chunk_id"):
-                warnings.append("Missing chunk ID")
-            if not item.get("replaces"):
-                warnings.append("Missing 'replaces' field")
-            if not item.get("description"):
-                warnings.append("Missing description")
+            warnings = [WARNING_TEXT[field] for field in status["warnings"]]
 
             tooltip_lines = []
 
-            if self.is_installed(item):
+            if status["installed"]:
                 tooltip_lines.append("Installed")
 
             if warnings:
@@ -810,9 +1394,8 @@ class ModOptionSelectorApp:
                 self.save_settings()
                 install_dir_var.set(short_path(directory))
                 install_dir_tooltip.text = directory
-            # Update main UI after directory change
-            self.update_install_button()
-            self.refresh_tree_icons()
+                # Update main UI after directory change
+                self.install_dir_changed()
             win.update_idletasks()
             win.geometry("")  # Reset window size to fit content
 
@@ -824,6 +1407,8 @@ class ModOptionSelectorApp:
         can_multi = BooleanVar(value=self.settings.get("CanInstallMultiple", False))
         prompt_user = BooleanVar(value=self.settings.get("PromptUser", False))
         prompt_exit = BooleanVar(value=self.settings.get("PromptBeforeExit", False))
+        incremental = BooleanVar(value=self.settings.get("IncrementalInstall", True))
+        use_store = BooleanVar(value=self.settings.get("UseExtractStore", True))
 
         # Checkbox to allow multiple simultaneous installs
         chk_multi = ttk.Checkbutton(
@@ -855,15 +1440,37 @@ class ModOptionSelectorApp:
         chk_prompt_exit.grid(row=4, column=0, columnspan=2, sticky="w", padx=10, pady=(10, 2))
         WidgetToolTip(chk_prompt_exit, "Ask for confirmation before closing the application.", theme=self.theme)
 
+        # Checkbox to skip files that are already installed with identical contents
+        chk_incremental = ttk.Checkbutton(
+            win,
+            text="Skip Unchanged Files",
+            variable=incremental,
+            style="Custom.TCheckbutton"
+        )
+        chk_incremental.grid(row=5, column=0, columnspan=2, sticky="w", padx=10, pady=(10, 2))
+        WidgetToolTip(chk_incremental, "Only extract files whose size or checksum differ from what is already installed.\n\n(Makes switching between similar options much faster)", theme=self.theme)
+
+        # Checkbox to keep decompressed archives so switching options is fast
+        chk_store = ttk.Checkbutton(
+            win,
+            text="Cache Extracted Files",
+            variable=use_store,
+            style="Custom.TCheckbutton"
+        )
+        chk_store.grid(row=6, column=0, columnspan=2, sticky="w", padx=10, pady=(10, 2))
+        WidgetToolTip(chk_store, "Decompress each ZIP only once (into data/.cache) and install by linking files from there.\n\n(Uses extra disk space if the cache is on a different drive than the install directory)", theme=self.theme)
+
         # OK button to save settings and close window
         def save_and_close():
             self.settings["CanInstallMultiple"] = can_multi.get()
             self.settings["PromptUser"] = prompt_user.get()
             self.settings["PromptBeforeExit"] = prompt_exit.get()
+            self.settings["IncrementalInstall"] = incremental.get()
+            self.settings["UseExtractStore"] = use_store.get()
             self.save_settings()
             win.destroy()
 
-        ttk.Button(win, text="OK", command=save_and_close).grid(row=5, column=0, columnspan=2, pady=10)
+        ttk.Button(win, text="OK", command=save_and_close).grid(row=7, column=0, columnspan=2, pady=10)
 
         # Final setup for modal behavior and appearance
         win.update_idletasks()
@@ -878,7 +1485,7 @@ class ModOptionSelectorApp:
         about_win.title("About")
         about_win.configure(bg=self.theme.get("background", "#2e2e2e"))
         about_win.resizable(False, False)
-        about_win.geometry("380x200") # Set fixed window size (width x height)
+        about_win.geometry("380x220") # Set fixed window size (width x height)
 
         fg = self.theme.get("foreground", "white")
         bg = self.theme.get("background", "#2e2e2e")
@@ -911,7 +1518,15 @@ class ModOptionSelectorApp:
         link_label2.pack(pady=5)
         link_label2.bind("<Button-1>", open_link2)
 
-        ttk.Button(about_win, text="OK", command=about_win.destroy).pack(pady=(10, 15))
+        about_buttons = Frame(about_win, bg=bg)
+        about_buttons.pack(pady=(10, 15))
+
+        def open_diagnostics():
+            self.open_diagnostics_window(about_win)
+            about_win.grab_set()  # Take back the grab once diagnostics is closed
+
+        ttk.Button(about_buttons, text="Diagnostics", command=open_diagnostics).pack(side="left", padx=5)
+        ttk.Button(about_buttons, text="OK", command=about_win.destroy).pack(side="left", padx=5)
 
         # Center the window on screen
         def center_window():
@@ -932,6 +1547,64 @@ class ModOptionSelectorApp:
         about_win.grab_set()
         self.master.wait_window(about_win)
 
+    def open_diagnostics_window(self, parent=None):
+        """
+        Show process memory use (current and peak RSS) and preview cache
+        usage, refreshed every second while the window is open.
+        """
+        parent = parent or self.master
+        win = Toplevel(parent)
+        win.title("Diagnostics")
+        win.configure(bg=self.theme.get("background", "#2e2e2e"))
+        win.resizable(False, False)
+
+        bg = self.theme.get("background", "#2e2e2e")
+        fg = self.theme.get("foreground", "white")
+
+        def megabytes(value):
+            return "n/a" if value is None else f"{value / (1024 * 1024):.1f} MB"
+
+        rows = ["Current RSS", "Peak RSS", "Preview cache", "Cached images", "Preview size cap"]
+        values = {}
+        for row, name in enumerate(rows):
+            ttk.Label(win, text=f"{name}:", background=bg, foreground=fg).grid(row=row, column=0, sticky="w", padx=(15, 5), pady=2)
+            values[name] = ttk.Label(win, text="", background=bg, foreground=fg)
+            values[name].grid(row=row, column=1, sticky="w", padx=(5, 15), pady=2)
+
+        def refresh():
+            if not win.winfo_exists():
+                return
+            current, peak = process_memory()
+            stats = self.preview_cache.stats()
+            counts = ", ".join(f"{count} {kind}" for kind, count in sorted(stats["counts"].items())) or "none"
+            cap = stats["max_size"]
+            values["Current RSS"].config(text=megabytes(current))
+            values["Peak RSS"].config(text=megabytes(peak))
+            values["Preview cache"].config(text=f"{megabytes(stats['total_bytes'])} of {megabytes(stats['budget_bytes'])}")
+            values["Cached images"].config(text=counts)
+            values["Preview size cap"].config(text=f"{cap[0]}x{cap[1]}" if cap else "none")
+            win.after(1000, refresh)
+
+        refresh()
+        ttk.Button(win, text="OK", command=win.destroy).grid(row=len(rows), column=0, columnspan=2, pady=(10, 15))
+
+        # Center the window on screen
+        def center_window():
+            win.update_idletasks()
+            width = win.winfo_width()
+            height = win.winfo_height()
+            x = (win.winfo_screenwidth() // 2) - (width // 2)
+            y = (win.winfo_screenheight() // 2) - (height // 2)
+            win.geometry(f"{width}x{height}+{x}+{y}")
+
+        win.after(0, center_window)  # Schedule after first draw
+
+        # Modal behavior
+        win.iconbitmap("data/assets/settings.ico")  # Window icon
+        win.transient(parent)
+        win.grab_set()
+        self.master.wait_window(win)
+
 class WidgetToolTip:
     def __init__(self, widget, text, theme=None):
         self.widget = widget